@@ -1,13 +1,13 @@
 import asyncio
-import json
 import os
+import uuid
 
-from mcp import Resource
-from mcp.types import Prompt
-
-from mcp_client import MCPClient
+from conversation_store import ConversationStore
+from mcp_client import MCPClient, SYNCED_TOOL_RESOURCES
 from dial_client import DialClient
 from models.message import Message, Role
+from profiling import Profiler
+from prompt_assembly import PromptAssembler
 from prompts import SYSTEM_PROMPT
 
 
@@ -15,6 +15,17 @@ from prompts import SYSTEM_PROMPT
 # Pay attention that `fetch` doesn't have resources and prompts
 
 async def main():
+    # Validate configuration before paying for any connection or heavy import
+    dial_api_key = os.getenv("DIAL_API_KEY")
+    dial_endpoint = os.getenv("DIAL_ENDPOINT")
+
+    if not dial_api_key or not dial_endpoint:
+        raise ValueError("DIAL_API_KEY and DIAL_ENDPOINT must be set in environment variables")
+
+    # Opt-in profiling (PROFILING_ENABLED), `kill -USR1 <pid>` toggles it at runtime
+    profiler = Profiler.from_env("agent")
+    profiler.install()
+
     # 1. Create MCP client and open connection to the MCP server
     async with MCPClient(mcp_server_url="http://localhost:8005/mcp") as mcp_client:
         
@@ -31,63 +42,86 @@ async def main():
         for tool in tools:
             print(f"  - {tool['function']['name']}: {tool['function']['description']}")
         print()
+
+        # Repeated lookups are served from subscribed resources, kept in sync by server notifications
+        synced_tools = mcp_client.sync_tool_results(SYNCED_TOOL_RESOURCES)
+        if synced_tools:
+            print(f"🔄 Synced tool results: {', '.join(synced_tools)}\n")
         
         # 4. Create DialClient
-        dial_api_key = os.getenv("DIAL_API_KEY")
-        dial_endpoint = os.getenv("DIAL_ENDPOINT")
-        
-        if not dial_api_key or not dial_endpoint:
-            raise ValueError("DIAL_API_KEY and DIAL_ENDPOINT must be set in environment variables")
-        
         dial_client = DialClient(
             api_key=dial_api_key,
             endpoint=dial_endpoint,
             tools=tools,
-            mcp_clients=mcp_client
+            mcp_clients=mcp_client,
+            profiler=profiler
         )
         
-        # 5. Create list with messages and add SYSTEM_PROMPT
-        messages = [Message(role=Role.SYSTEM, content=SYSTEM_PROMPT)]
-        
-        # 6. Add Prompts from MCP server as User messages
+        # 5. Open conversation store and resume the conversation if it was persisted before
+        conversation_store = ConversationStore(os.getenv("CONVERSATION_STORE_PATH", ".conversations/conversations.db"))
+        conversation_id = os.getenv("CONVERSATION_ID") or uuid.uuid4().hex
+
+        # 6. Get Prompts from MCP server, they are loaded into the conversation only when a turn calls for them
         prompts = await mcp_client.get_prompts()
         print("💡 Available MCP Prompts:")
         for prompt in prompts:
             print(f"  - {prompt.name}: {prompt.description}")
-            # Get the actual prompt content and add as user message
-            prompt_content = await mcp_client.get_prompt(prompt.name)
-            messages.append(Message(role=Role.USER, content=f"Guidance for {prompt.name}:\n{prompt_content}"))
         print()
-        
+        prompt_assembler = PromptAssembler(
+            system_prompt=SYSTEM_PROMPT,
+            prompt_sources={prompt.name: mcp_client for prompt in prompts},
+            pinned=filter(None, os.getenv("PINNED_GUIDANCE", "").split(","))
+        )
+
+        if conversation_store.exists(conversation_id):
+            messages = conversation_store.load(conversation_id)
+            prompt_assembler.restore(messages)
+            print(f"♻️ Resumed conversation {conversation_id} with {len(messages)} messages\n")
+        else:
+            # Deterministic prefix: SYSTEM_PROMPT and pinned guidance
+            messages = await prompt_assembler.build_prefix()
+            conversation_store.append(conversation_id, messages)
+            print(f"📝 Started conversation {conversation_id}\n")
+        persisted_count = len(messages)
+
         # 7. Create console chat (infinite loop + ability to exit + preserve message history)
         print("=" * 60)
         print("👤 User Management Agent")
         print("=" * 60)
         print("Type 'exit' or 'quit' to end the conversation\n")
         
-        while True:
-            # Get user input
-            user_input = input("👤 You: ").strip()
-            
-            # Check for exit commands
-            if user_input.lower() in ['exit', 'quit']:
-                print("\n👋 Goodbye!")
-                break
-            
-            # Skip empty inputs
-            if not user_input:
-                continue
-            
-            # Add user message to history
-            messages.append(Message(role=Role.USER, content=user_input))
-            
-            # Get AI response
-            try:
-                ai_response = await dial_client.get_completion(messages)
-                messages.append(ai_response)
-                print()
-            except Exception as e:
-                print(f"❌ Error: {e}\n")
+        try:
+            while True:
+                # Get user input
+                user_input = input("👤 You: ").strip()
+
+                # Check for exit commands
+                if user_input.lower() in ['exit', 'quit']:
+                    print("\n👋 Goodbye!")
+                    break
+
+                # Skip empty inputs
+                if not user_input:
+                    continue
+
+                # Add guidance the input calls for (once per conversation) and the user message to history
+                messages.extend(await prompt_assembler.guidance_for(user_input))
+                messages.append(Message(role=Role.USER, content=user_input))
+
+                # Get AI response, slow turns dump their call tree and profile
+                try:
+                    async with profiler.trace("agent_turn"):
+                        ai_response = await dial_client.get_completion(messages)
+                    messages.append(ai_response)
+                    print()
+                except Exception as e:
+                    print(f"❌ Error: {e}\n")
+
+                # Persist everything added during this turn (user input, tool calls, tool results, AI answer)
+                conversation_store.append(conversation_id, messages[persisted_count:])
+                persisted_count = len(messages)
+        finally:
+            conversation_store.close()
 
 
 if __name__ == "__main__":
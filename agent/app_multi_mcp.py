@@ -1,13 +1,11 @@
 import asyncio
-import json
 import os
 
-from mcp import Resource
-from mcp.types import Prompt
-
-from mcp_client import MCPClient
+from mcp_client import MCPClient, SYNCED_TOOL_RESOURCES
 from dial_client import DialClient
 from models.message import Message, Role
+from profiling import Profiler
+from prompt_assembly import PromptAssembler
 from prompts import SYSTEM_PROMPT
 
 
@@ -18,7 +16,8 @@ async def main():
     # Dictionary to hold multiple MCP clients
     mcp_clients = {}
     all_tools = []
-    all_messages = [Message(role=Role.SYSTEM, content=SYSTEM_PROMPT)]
+    # Prompt name -> MCP client that provides it, prompts are loaded only when a turn calls for them
+    prompt_sources = {}
     
     # MCP servers to connect to
     mcp_servers = {
@@ -49,6 +48,11 @@ async def main():
             for tool in tools:
                 print(f"    - {tool['function']['name']}: {tool['function']['description']}")
             all_tools.extend(tools)
+
+            # Repeated lookups are served from subscribed resources (only servers offering the tools and subscriptions)
+            synced_tools = mcp_client.sync_tool_results(SYNCED_TOOL_RESOURCES)
+            if synced_tools:
+                print(f"  🔄 Synced tool results from {server_name}: {', '.join(synced_tools)}")
             
             # Get prompts
             prompts = await mcp_client.get_prompts()
@@ -56,12 +60,7 @@ async def main():
                 print(f"  💡 Prompts from {server_name}:")
                 for prompt in prompts:
                     print(f"    - {prompt.name}: {prompt.description}")
-                    # Get the actual prompt content and add as user message
-                    prompt_content = await mcp_client.get_prompt(prompt.name)
-                    all_messages.append(Message(
-                        role=Role.USER, 
-                        content=f"Guidance for {prompt.name} from {server_name}:\n{prompt_content}"
-                    ))
+                    prompt_sources.setdefault(prompt.name, mcp_client)
             
             print()
         except Exception as e:
@@ -78,13 +77,26 @@ async def main():
     if not dial_api_key or not dial_endpoint:
         raise ValueError("DIAL_API_KEY and DIAL_ENDPOINT must be set in environment variables")
     
+    # Opt-in profiling (PROFILING_ENABLED), `kill -USR1 <pid>` toggles it at runtime
+    profiler = Profiler.from_env("agent")
+    profiler.install()
+    
     dial_client = DialClient(
         api_key=dial_api_key,
         endpoint=dial_endpoint,
         tools=all_tools,
-        mcp_clients=mcp_clients
+        mcp_clients=mcp_clients,
+        profiler=profiler
     )
     
+    # Deterministic prefix: SYSTEM_PROMPT and pinned guidance
+    prompt_assembler = PromptAssembler(
+        system_prompt=SYSTEM_PROMPT,
+        prompt_sources=prompt_sources,
+        pinned=filter(None, os.getenv("PINNED_GUIDANCE", "").split(","))
+    )
+    all_messages = await prompt_assembler.build_prefix()
+
     # Create console chat
     print("=" * 60)
     print("👤 Multi-MCP User Management Agent")
@@ -106,12 +118,14 @@ async def main():
             if not user_input:
                 continue
             
-            # Add user message to history
+            # Add guidance the input calls for (once per conversation) and the user message to history
+            all_messages.extend(await prompt_assembler.guidance_for(user_input))
             all_messages.append(Message(role=Role.USER, content=user_input))
             
-            # Get AI response
+            # Get AI response, slow turns dump their call tree and profile
             try:
-                ai_response = await dial_client.get_completion(all_messages)
+                async with profiler.trace("agent_turn"):
+                    ai_response = await dial_client.get_completion(all_messages)
                 all_messages.append(ai_response)
                 print()
             except Exception as e:
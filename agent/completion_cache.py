@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+
+class CacheMode(StrEnum):
+    PASSTHROUGH = "passthrough"  # always call the model, nothing is stored
+    RECORD = "record"  # always call the model and store the chunk stream
+    REPLAY = "replay"  # only replay stored streams, a miss is an error (fully offline)
+
+
+class CacheMissError(Exception):
+    pass
+
+
+class CompletionCache:
+    """
+    Content-addressed record/replay cache for streamed chat completions.
+
+    Streams are stored as JSONL files (one serialized chunk per line) named after the hash of the
+    canonical request, so a replay yields exactly the chunks that were recorded, tool call deltas included.
+    """
+
+    def __init__(self, cache_dir: str | Path, mode: CacheMode = CacheMode.PASSTHROUGH, max_size_bytes: int = 256 * 1024 * 1024) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.mode = CacheMode(mode)
+        self.max_size_bytes = max_size_bytes
+
+    @classmethod
+    def from_env(cls) -> "CompletionCache":
+        return cls(
+            cache_dir=os.getenv("DIAL_CACHE_DIR", ".dial_cache"),
+            mode=CacheMode(os.getenv("DIAL_CACHE_MODE", CacheMode.PASSTHROUGH)),
+            max_size_bytes=int(float(os.getenv("DIAL_CACHE_MAX_MB", "256")) * 1024 * 1024),
+        )
+
+    @staticmethod
+    def key(request: dict[str, Any]) -> str:
+        """Hash of the canonical request: model, messages, tool schemas and sampling parameters"""
+        canonical = json.dumps(
+            {k: v for k, v in request.items() if k != "stream"},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def stream(
+            self,
+            request: dict[str, Any],
+            create_stream: Callable[[dict[str, Any]], Awaitable[AsyncIterator[Any]]]
+    ) -> AsyncIterator[Any]:
+        """Return the chunk stream for the request according to the cache mode"""
+        if self.mode == CacheMode.PASSTHROUGH:
+            return await create_stream(request)
+
+        path = self.cache_dir / f"{self.key(request)}.jsonl"
+        if self.mode == CacheMode.REPLAY:
+            if not path.exists():
+                raise CacheMissError(f"No recorded completion for this request ({path.name}), record it with DIAL_CACHE_MODE=record")
+            return self._replay(path)
+
+        return self._record(path, await create_stream(request))
+
+    async def _replay(self, path: Path) -> AsyncIterator[Any]:
+        from openai.types.chat import ChatCompletionChunk
+
+        # Touch the entry, eviction removes the least recently used streams first
+        os.utime(path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield ChatCompletionChunk.model_validate_json(line)
+
+    async def _record(self, path: Path, stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            try:
+                async for chunk in stream:
+                    f.write(chunk.model_dump_json(exclude_unset=True) + "\n")
+                    yield chunk
+            except BaseException:
+                # Never store an incomplete stream
+                f.close()
+                tmp_path.unlink(missing_ok=True)
+                raise
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = [(entry.stat(), entry) for entry in self.cache_dir.glob("*.jsonl")]
+        total_size = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total_size <= self.max_size_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total_size -= stat.st_size
@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import time
+from collections.abc import Iterator, MutableSequence
+from pathlib import Path
+
+from models.message import Message
+
+
+class LazyMessageList(MutableSequence):
+    """Message history backed by stored payloads that are only parsed into `Message` objects on first access"""
+
+    def __init__(self, payloads: list[str]) -> None:
+        self._items: list[str | Message] = list(payloads)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if isinstance(item, str):
+            item = Message.from_dict(json.loads(item))
+            self._items[index] = item
+        return item
+
+    def __setitem__(self, index, value) -> None:
+        self._items[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def insert(self, index: int, value: Message) -> None:
+        self._items.insert(index, value)
+
+    def search(self, text: str) -> Iterator[Message]:
+        """Messages that may contain `text`: stored payloads are matched as raw JSON, only the matches are parsed"""
+        needle = json.dumps(text, ensure_ascii=False)[1:-1]
+        for index, item in enumerate(self._items):
+            if isinstance(item, str) and needle not in item:
+                continue
+            yield self[index]
+
+
+class ConversationStore:
+    """Append-only SQLite log of conversation messages with indexed lookup by conversation id"""
+
+    def __init__(self, db_path: str | Path) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.db_path)
+        # WAL keeps appends cheap and lets readers run next to a writer
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                conversation_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (conversation_id, seq)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, conversation_id: str, messages: list[Message]) -> None:
+        """Append messages to the end of the conversation log"""
+        if not messages:
+            return
+
+        next_seq = self._next_seq(conversation_id)
+        now = time.time()
+        rows = [
+            (conversation_id, next_seq + offset, now, json.dumps(message.to_dict(), ensure_ascii=False))
+            for offset, message in enumerate(messages)
+        ]
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO messages (conversation_id, seq, created_at, payload) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def load(self, conversation_id: str) -> LazyMessageList:
+        """Load all messages of the conversation in their original order, deferring parsing until access"""
+        cursor = self._connection.execute(
+            "SELECT payload FROM messages WHERE conversation_id = ? ORDER BY seq",
+            (conversation_id,)
+        )
+        return LazyMessageList([payload for (payload,) in cursor])
+
+    def exists(self, conversation_id: str) -> bool:
+        cursor = self._connection.execute(
+            "SELECT 1 FROM messages WHERE conversation_id = ? LIMIT 1",
+            (conversation_id,)
+        )
+        return cursor.fetchone() is not None
+
+    def count(self, conversation_id: str) -> int:
+        return self._next_seq(conversation_id)
+
+    def list_conversations(self) -> list[str]:
+        cursor = self._connection.execute("SELECT DISTINCT conversation_id FROM messages ORDER BY conversation_id")
+        return [conversation_id for (conversation_id,) in cursor]
+
+    def delete(self, conversation_id: str) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+
+    def compact(self, max_age_seconds: float | None = None) -> None:
+        """Drop conversations whose last message is older than max_age_seconds and reclaim disk space"""
+        if max_age_seconds is not None:
+            cutoff = time.time() - max_age_seconds
+            with self._connection:
+                self._connection.execute(
+                    """
+                    DELETE FROM messages WHERE conversation_id IN (
+                        SELECT conversation_id FROM messages
+                        GROUP BY conversation_id
+                        HAVING MAX(created_at) < ?
+                    )
+                    """,
+                    (cutoff,)
+                )
+        self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._connection.execute("VACUUM")
+
+    def _next_seq(self, conversation_id: str) -> int:
+        cursor = self._connection.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE conversation_id = ?",
+            (conversation_id,)
+        )
+        return cursor.fetchone()[0]
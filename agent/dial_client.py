@@ -1,29 +1,56 @@
-import json
 from collections import defaultdict
 from typing import Any
 
-from openai import AsyncAzureOpenAI
-
+from completion_cache import CacheMode, CompletionCache
+from llm_router import Deployment, LLMRouter
 from models.message import Message, Role
 from mcp_client import MCPClient
+from profiling import Profiler
+from prompt_assembly import canonical_tools
+from tool_validator import compile_schema, parse_arguments
 
 
 class DialClient:
     """Handles AI model interactions and integrates with MCP client(s)"""
 
-    def __init__(self, api_key: str, endpoint: str, tools: list[dict[str, Any]], mcp_clients: dict[str, MCPClient] | MCPClient):
-        self.tools = tools
+    def __init__(
+            self,
+            api_key: str,
+            endpoint: str,
+            tools: list[dict[str, Any]],
+            mcp_clients: dict[str, MCPClient] | MCPClient,
+            completion_cache: CompletionCache | None = None,
+            deployments: list[Deployment] | None = None,
+            profiler: Profiler | None = None
+    ):
+        # Byte-stable tool schemas keep the request prefix identical between turns and runs (provider prompt caching)
+        self.tools = canonical_tools(tools)
+        # Compile every tool schema once, arguments are validated locally before each MCP call
+        self._validators = {
+            tool["function"]["name"]: compile_schema(tool["function"].get("parameters") or {})
+            for tool in tools
+        }
         # Support both single MCP client (backwards compatible) and multiple clients
         if isinstance(mcp_clients, MCPClient):
             self.mcp_clients = {"default": mcp_clients}
         else:
             self.mcp_clients = mcp_clients
         
-        self.openai = AsyncAzureOpenAI(
-            api_key=api_key,
-            azure_endpoint=endpoint,
-            api_version="2025-01-01-preview"
-        )
+        # Routes completions over the deployment pool (DIAL_DEPLOYMENTS) or the single api_key/endpoint deployment
+        self.router = LLMRouter(deployments) if deployments else LLMRouter.from_env(api_key, endpoint)
+        # Record/replay cache for completions, configured with DIAL_CACHE_* env variables by default
+        self.completion_cache = completion_cache or CompletionCache.from_env()
+        # The model goes into the request (and the cache key), a recording can only be attributed to it when the pool
+        # serves a single model, the deployment that answers a request is not known in advance
+        models = self.router.models
+        if len(models) > 1 and self.completion_cache.mode != CacheMode.PASSTHROUGH:
+            raise ValueError(
+                f"DIAL_CACHE_MODE={self.completion_cache.mode} needs deployments serving a single model, "
+                f"got: {', '.join(models)}"
+            )
+        self.model = ",".join(models)
+        # Times LLM streams and tool calls, slow turns get a call tree split into these phases
+        self.profiler = profiler or Profiler.from_env("agent")
 
     def _collect_tool_calls(self, tool_deltas):
         """Convert streaming tool call deltas to complete tool calls"""
@@ -40,15 +67,18 @@ class DialClient:
 
     async def _stream_response(self, messages: list[Message]) -> Message:
         """Stream OpenAI response and handle tool calls"""
-        stream = await self.openai.chat.completions.create(
-            **{
-                "model": "gpt-4o",
-                "messages": [msg.to_dict() for msg in messages],
-                "tools": self.tools,
-                "temperature": 0.0,
-                "stream": True
-            }
-        )
+        async with self.profiler.trace("llm_stream"):
+            return await self._stream_completion(messages)
+
+    async def _stream_completion(self, messages: list[Message]) -> Message:
+        request = {
+            "model": self.model,
+            "messages": [msg.to_dict() for msg in messages],
+            "tools": self.tools,
+            "temperature": 0.0,
+            "stream": True
+        }
+        stream = await self.completion_cache.stream(request, self.router.stream)
 
         content = ""
         tool_deltas = []
@@ -96,9 +126,13 @@ class DialClient:
             tool_call_id = tool_call["id"]
             
             try:
-                # Parse JSON arguments
-                tool_args = json.loads(tool_args_json)
-                
+                # Parse and validate JSON arguments locally, the model gets precise errors without an MCP round trip
+                tool_args = parse_arguments(tool_args_json)
+                validator = self._validators.get(tool_name)
+                if validator is None:
+                    raise ValueError(f"Unknown tool: {tool_name}")
+                validator(tool_args)
+
                 # 3. Find the appropriate MCP client for this tool
                 mcp_client = self._find_mcp_client_for_tool(tool_name)
                 
@@ -107,7 +141,8 @@ class DialClient:
                 
                 # Call MCP client tool
                 print(f"    🔧 Calling tool: {tool_name}")
-                result = await mcp_client.call_tool(tool_name, tool_args)
+                async with self.profiler.trace(f"tool:{tool_name}"):
+                    result = await mcp_client.call_tool(tool_name, tool_args)
                 
                 # Add successful tool message
                 messages.append(Message(
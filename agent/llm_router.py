@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+DEFAULT_API_VERSION = "2025-01-01-preview"
+
+
+@dataclass
+class Deployment:
+    name: str
+    endpoint: str
+    api_key: str
+    model: str = "gpt-4o"
+    api_version: str = DEFAULT_API_VERSION
+
+
+@dataclass
+class DeploymentStats:
+    """Rolling time-to-first-token and error statistics of a deployment"""
+    ttft: deque = field(default_factory=lambda: deque(maxlen=20))
+    # Time waited by attempts cancelled after losing a hedge race, their TTFT is at least that long
+    ttft_lower_bounds: deque = field(default_factory=lambda: deque(maxlen=20))
+    # (timestamp, succeeded), only the outcomes of the last `error_window` seconds count
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=50))
+    error_window: float = 300.0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+
+    @property
+    def ttft_p50(self) -> float | None:
+        if not self.ttft:
+            return None
+        return sorted(self.ttft)[len(self.ttft) // 2]
+
+    @property
+    def ttft_estimate(self) -> float | None:
+        """Median TTFT, raised by lower bounds of attempts that lost a race since the last success"""
+        if not self.ttft and not self.ttft_lower_bounds:
+            return None
+        return max(self.ttft_p50 or 0.0, max(self.ttft_lower_bounds, default=0.0))
+
+    @property
+    def error_rate(self) -> float:
+        # Old errors expire, otherwise a deployment that is rarely tried could never get back into rotation
+        since = time.monotonic() - self.error_window
+        recent = [succeeded for at, succeeded in self.outcomes if at >= since]
+        if not recent:
+            return 0.0
+        return recent.count(False) / len(recent)
+
+    def record_success(self, ttft: float) -> None:
+        self.ttft.append(ttft)
+        self.ttft_lower_bounds.clear()
+        self.outcomes.append((time.monotonic(), True))
+        self.consecutive_failures = 0
+
+    def record_cancelled(self, waited: float) -> None:
+        self.ttft_lower_bounds.append(waited)
+
+    def record_failure(self, cooldown: float) -> None:
+        self.outcomes.append((time.monotonic(), False))
+        self.consecutive_failures += 1
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+
+
+class LLMRouter:
+    """
+    Routes streamed completions over a pool of deployments:
+    - each request goes to the healthy deployment with the lowest rolling median time-to-first-token
+    - when no first token arrives within `hedge_after` seconds, the request is hedged to the next deployment
+      and the first one to start streaming wins
+    - 429/5xx/connection errors put the deployment on cooldown (honoring retry-after) and fail over to the next one
+    """
+
+    def __init__(
+            self,
+            deployments: list[Deployment],
+            hedge_after: float | None = None,
+            max_error_rate: float = 0.5,
+            error_window: float = 300.0,
+            client_factory: Callable[[Deployment], Any] | None = None,
+    ) -> None:
+        if not deployments:
+            raise ValueError("At least one deployment is required")
+        self.deployments = deployments
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate
+        self.stats = {deployment.name: DeploymentStats(error_window=error_window) for deployment in deployments}
+        self._client_factory = client_factory or self._create_client
+        self._clients: dict[str, Any] = {}
+
+    @classmethod
+    def from_env(cls, api_key: str, endpoint: str) -> "LLMRouter":
+        """
+        Build the pool from DIAL_DEPLOYMENTS, a JSON list of deployments
+        (`[{"name": ..., "endpoint": ..., "api_key": ..., "model": ..., "api_version": ...}]`,
+        endpoint and api_key default to DIAL_ENDPOINT/DIAL_API_KEY), or a single deployment otherwise.
+        """
+        raw_deployments = os.getenv("DIAL_DEPLOYMENTS")
+        if raw_deployments:
+            deployments = [
+                Deployment(**{"endpoint": endpoint, "api_key": api_key, **item})
+                for item in json.loads(raw_deployments)
+            ]
+        else:
+            deployments = [Deployment(name="default", endpoint=endpoint, api_key=api_key)]
+
+        hedge_after = os.getenv("DIAL_HEDGE_AFTER_SECONDS")
+        return cls(deployments, hedge_after=float(hedge_after) if hedge_after else None)
+
+    @property
+    def models(self) -> list[str]:
+        """Distinct models served by the pool"""
+        return sorted({deployment.model for deployment in self.deployments})
+
+    def ranked(self) -> list[Deployment]:
+        """Deployments in the order they should be tried"""
+        now = time.monotonic()
+
+        def is_healthy(deployment: Deployment) -> bool:
+            stats = self.stats[deployment.name]
+            return stats.cooldown_until <= now and stats.error_rate <= self.max_error_rate
+
+        def speed(deployment: Deployment) -> tuple[int, float]:
+            # Untried deployments go first so every deployment gets measured, then measured ones by TTFT.
+            # Deployments only known to have lost hedge races go last, hedging still gives them a chance to win
+            stats = self.stats[deployment.name]
+            estimate = stats.ttft_estimate
+            if estimate is None:
+                return 0, 0.0
+            return (1 if stats.ttft else 2), estimate
+
+        healthy = sorted((d for d in self.deployments if is_healthy(d)), key=speed)
+        # Unhealthy deployments stay as a last resort, the ones that recover soonest first
+        unhealthy = sorted(
+            (d for d in self.deployments if not is_healthy(d)),
+            key=lambda d: (self.stats[d.name].cooldown_until, self.stats[d.name].error_rate)
+        )
+        return healthy + unhealthy
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            name: {
+                "ttft_p50": stats.ttft_p50,
+                "ttft_estimate": stats.ttft_estimate,
+                "error_rate": stats.error_rate,
+                "cooldown_seconds": max(0.0, stats.cooldown_until - now),
+            }
+            for name, stats in self.stats.items()
+        }
+
+    async def stream(self, request: dict[str, Any]) -> AsyncIterator[Any]:
+        """Open a completion stream on the best deployment, failing over and hedging as needed"""
+        candidates = self.ranked()
+        running: set[asyncio.Task] = set()
+        last_error: Exception | None = None
+
+        try:
+            while True:
+                if not running:
+                    if not candidates:
+                        raise last_error
+                    running.add(asyncio.ensure_future(self._open(candidates.pop(0), request)))
+
+                # Only wait for the hedge deadline while there is a deployment left to hedge to
+                timeout = self.hedge_after if candidates else None
+                done, running = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # No first token before the deadline: race the request against the next deployment
+                    backup = candidates.pop(0)
+                    print(f"    ⏱️ No response within {self.hedge_after}s, hedging to {backup.name}")
+                    running.add(asyncio.ensure_future(self._open(backup, request)))
+                    continue
+
+                winner = None
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        if not self._is_retryable(error):
+                            raise error
+                        last_error = error
+                        print(f"    ⚠️ Deployment failed ({error}), failing over")
+                        if candidates:
+                            running.add(asyncio.ensure_future(self._open(candidates.pop(0), request)))
+                    elif winner is None:
+                        winner = task.result()
+                    else:
+                        # Two deployments answered at the same moment, drop the extra stream
+                        await task.result()[2].aclose()
+
+                if winner is not None:
+                    return self._relay(*winner)
+        finally:
+            for task in running:
+                task.cancel()
+            # Wait for the losers to unwind: _open records their TTFT lower bound and closes their streams on cancel
+            for result in await asyncio.gather(*running, return_exceptions=True):
+                if isinstance(result, tuple):
+                    # Got its first token before the cancel landed, drop the extra stream
+                    await result[2].aclose()
+
+    async def _open(self, deployment: Deployment, request: dict[str, Any]):
+        """Send the request and wait for the first chunk, return (deployment, first chunk, chunk iterator)"""
+        stats = self.stats[deployment.name]
+        client = self._clients.get(deployment.name)
+        if client is None:
+            client = self._clients[deployment.name] = self._client_factory(deployment)
+
+        started = time.monotonic()
+        stream = None
+        try:
+            stream = await client.chat.completions.create(**{**request, "model": deployment.model})
+            chunks = aiter(stream)
+            first_chunk = await anext(chunks)
+        except asyncio.CancelledError:
+            # Lost a hedge race: not a failure, and not a TTFT sample either, only a lower bound of it
+            stats.record_cancelled(time.monotonic() - started)
+            if stream is not None:
+                await stream.close()
+            raise
+        except Exception as e:
+            if self._is_retryable(e):
+                stats.record_failure(self._cooldown(e, stats))
+            raise
+
+        stats.record_success(time.monotonic() - started)
+        return deployment, first_chunk, chunks
+
+    async def _relay(self, deployment: Deployment, first_chunk: Any, chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        yield first_chunk
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            if self._is_retryable(e):
+                self.stats[deployment.name].record_failure(self._cooldown(e, self.stats[deployment.name]))
+            raise
+
+    def _create_client(self, deployment: Deployment):
+        from openai import AsyncAzureOpenAI
+
+        return AsyncAzureOpenAI(
+            api_key=deployment.api_key,
+            azure_endpoint=deployment.endpoint,
+            api_version=deployment.api_version,
+            # With several deployments failover is handled by the router, retrying the same one would only add latency
+            max_retries=0 if len(self.deployments) > 1 else 2
+        )
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        import openai
+
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, StopAsyncIteration)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def _cooldown(error: Exception, stats: DeploymentStats) -> float:
+        """Seconds to keep the deployment out of rotation: retry-after if sent, exponential backoff otherwise"""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after_ms = response.headers.get("retry-after-ms")
+            retry_after = response.headers.get("retry-after")
+            try:
+                if retry_after_ms:
+                    return float(retry_after_ms) / 1000
+                if retry_after:
+                    return float(retry_after)
+            except ValueError:
+                pass
+        return min(60.0, 2.0 ** stats.consecutive_failures)
@@ -1,9 +1,21 @@
-from typing import Optional, Any
+from __future__ import annotations
 
-from mcp import ClientSession
-from mcp.client.streamable_http import streamablehttp_client
-from mcp.types import CallToolResult, TextContent, GetPromptResult, ReadResourceResult, Resource, TextResourceContents, BlobResourceContents, Prompt
-from pydantic import AnyUrl
+import asyncio
+import os
+import string
+from typing import TYPE_CHECKING, Optional, Any
+
+# The MCP client stack is heavy to import, it is loaded on first connection instead of at startup
+if TYPE_CHECKING:
+    from mcp import ClientSession
+    from mcp.types import CallToolResult, GetPromptResult, ReadResourceResult, Resource, ResourceTemplate, Prompt, ServerCapabilities
+    from pydantic import AnyUrl
+
+# Tools whose result is also a subscribable resource (tool name -> resource URI template filled with the tool arguments).
+# Repeated calls are served from the synced copy of the resource, the server notifies the client when it changes
+SYNCED_TOOL_RESOURCES = {"get_user_by_id": "users-management://users/{user_id}"}
+# Resources subscribed for tool calls, the least recently used one is unsubscribed beyond this
+MAX_SYNCED_TOOL_RESOURCES = int(os.getenv("MCP_MAX_SYNCED_TOOL_RESOURCES", "100"))
 
 
 class MCPClient:
@@ -12,10 +24,21 @@ class MCPClient:
     def __init__(self, mcp_server_url: str) -> None:
         self.mcp_server_url = mcp_server_url
         self.session: Optional[ClientSession] = None
+        self.server_capabilities: Optional[ServerCapabilities] = None
         self._streams_context = None
         self._session_context = None
+        # Locally synced copies of subscribed resources (uri -> content, None while a refresh is pending)
+        self._synced_resources: dict[str, str | bytes | None] = {}
+        self._refresh_tasks: set[asyncio.Task] = set()
+        self._tool_names: set[str] = set()
+        # Tool name -> resource URI template, and the URIs subscribed for tool calls (least recently used first)
+        self._tool_resources: dict[str, str] = {}
+        self._tool_synced_uris: dict[str, None] = {}
 
     async def __aenter__(self):
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
         # 1. Call streamablehttp_client method with mcp_server_url
         self._streams_context = streamablehttp_client(self.mcp_server_url)
         
@@ -23,13 +46,14 @@ class MCPClient:
         read_stream, write_stream, _ = await self._streams_context.__aenter__()
         
         # 3. Create ClientSession
-        self._session_context = ClientSession(read_stream, write_stream)
+        self._session_context = ClientSession(read_stream, write_stream, message_handler=self._handle_message)
         
         # 4. Enter session context
         self.session = await self._session_context.__aenter__()
         
         # 5. Initialize session and print result
         init_result = await self.session.initialize()
+        self.server_capabilities = init_result.capabilities
         print(f"✅ MCP Server initialized: {init_result}\n")
         
         # 6. Return self
@@ -50,6 +74,8 @@ class MCPClient:
         # 1. Call list_tools
         tools = await self.session.list_tools()
         
+        self._tool_names = {tool.name for tool in tools.tools}
+
         # 2. Return list with dicts according to DIAL specification
         return [
             {
@@ -68,6 +94,13 @@ class MCPClient:
         if not self.session:
             raise RuntimeError("MCP client not connected. Call connect() first.")
 
+        from mcp.types import TextContent
+
+        synced = await self._synced_tool_result(tool_name, tool_args)
+        if synced is not None:
+            print(f"    ⚙️ (synced copy): {synced}\n")
+            return synced
+
         # 1. Call tool on MCP server
         tool_result: CallToolResult = await self.session.call_tool(tool_name, tool_args)
         
@@ -83,6 +116,55 @@ class MCPClient:
         else:
             return content
 
+    def sync_tool_results(self, tool_resources: dict[str, str]) -> list[str]:
+        """
+        Serve repeated calls of tools from subscribed copies of their resources (tool name -> URI template, see
+        SYNCED_TOOL_RESOURCES). Only tools the server offers are synced, and only if it supports subscriptions.
+        Returns the synced tool names.
+        """
+        if not self._supports_subscriptions():
+            return []
+        self._tool_resources = {name: template for name, template in tool_resources.items() if name in self._tool_names}
+        return list(self._tool_resources)
+
+    async def _synced_tool_result(self, tool_name: str, tool_args: dict[str, Any]) -> str | bytes | None:
+        """Result of a synced tool from its resource, None when the tool has to be called instead"""
+        template = self._tool_resources.get(tool_name)
+        if template is None:
+            return None
+        fields = {field for _, field, _, _ in string.Formatter().parse(template) if field}
+        if set(tool_args) != fields:
+            return None
+        uri = template.format(**tool_args)
+
+        try:
+            if uri in self._synced_resources:
+                content = await self.get_resource(uri)
+            else:
+                content = await self.subscribe_resource(uri)
+        except Exception:
+            # Rejected subscription or failed read (e.g. the user was deleted), the tool call reports the error
+            if uri in self._synced_resources:
+                await self._unsubscribe_tool_resource(uri)
+            return None
+
+        self._tool_synced_uris.pop(uri, None)
+        self._tool_synced_uris[uri] = None
+        while len(self._tool_synced_uris) > MAX_SYNCED_TOOL_RESOURCES:
+            await self._unsubscribe_tool_resource(next(iter(self._tool_synced_uris)))
+        return content
+
+    async def _unsubscribe_tool_resource(self, uri: str) -> None:
+        self._tool_synced_uris.pop(uri, None)
+        try:
+            await self.unsubscribe_resource(uri)
+        except Exception as e:
+            print(f"⚠️ Error unsubscribing from resource {uri}: {e}")
+
+    def _supports_subscriptions(self) -> bool:
+        capabilities = self.server_capabilities
+        return bool(capabilities and capabilities.resources and capabilities.resources.subscribe)
+
     async def get_resources(self) -> list[Resource]:
         """Get available resources from MCP server"""
         if not self.session:
@@ -95,11 +177,80 @@ class MCPClient:
             print(f"⚠️ Error getting resources: {e}")
             return []
 
+    async def get_resource_templates(self) -> list[ResourceTemplate]:
+        """Get available resource templates (parameterized resources) from MCP server"""
+        if not self.session:
+            raise RuntimeError("MCP client not connected.")
+
+        try:
+            templates_result = await self.session.list_resource_templates()
+            return templates_result.resourceTemplates
+        except Exception as e:
+            print(f"⚠️ Error getting resource templates: {e}")
+            return []
+
     async def get_resource(self, uri: AnyUrl) -> str | bytes:
-        """Get specific resource content"""
+        """Get specific resource content, subscribed resources are served from the local copy"""
+        if not self.session:
+            raise RuntimeError("MCP client not connected.")
+
+        synced = self._synced_resources.get(str(uri))
+        if synced is not None:
+            return synced
+        content = await self._read_resource(uri)
+        if str(uri) in self._synced_resources:
+            self._synced_resources[str(uri)] = content
+        return content
+
+    async def subscribe_resource(self, uri: AnyUrl) -> str | bytes:
+        """Subscribe to resource updates and keep a local copy of it in sync, returns the current content"""
+        if not self.session:
+            raise RuntimeError("MCP client not connected.")
+
+        if not self._supports_subscriptions():
+            raise RuntimeError(f"MCP server {self.mcp_server_url} does not support resource subscriptions")
+
+        self._synced_resources[str(uri)] = None
+        try:
+            await self.session.subscribe_resource(uri)
+        except Exception:
+            # Rejected by the server (e.g. invalid search query), there is nothing to keep in sync
+            self._synced_resources.pop(str(uri), None)
+            raise
+        return await self.get_resource(uri)
+
+    async def unsubscribe_resource(self, uri: AnyUrl) -> None:
         if not self.session:
             raise RuntimeError("MCP client not connected.")
 
+        self._synced_resources.pop(str(uri), None)
+        await self.session.unsubscribe_resource(uri)
+
+    async def _handle_message(self, message) -> None:
+        from mcp.types import ResourceUpdatedNotification, ServerNotification
+
+        if isinstance(message, ServerNotification) and isinstance(message.root, ResourceUpdatedNotification):
+            uri = str(message.root.params.uri)
+            if uri in self._synced_resources:
+                # Drop the stale copy right away, then refresh it outside of the receive loop
+                # (awaiting a request inside the message handler would block its own response)
+                self._synced_resources[uri] = None
+                task = asyncio.create_task(self._refresh_resource(uri))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh_resource(self, uri: str) -> None:
+        try:
+            content = await self._read_resource(uri)
+        except Exception as e:
+            print(f"⚠️ Error refreshing resource {uri}: {e}")
+            return
+        if uri in self._synced_resources:
+            self._synced_resources[uri] = content
+
+    async def _read_resource(self, uri: AnyUrl | str) -> str | bytes:
+        from mcp.types import TextResourceContents, BlobResourceContents
+
         # 1. Get resource by uri
         resource_result: ReadResourceResult = await self.session.read_resource(uri)
         
@@ -131,6 +282,8 @@ class MCPClient:
         if not self.session:
             raise RuntimeError("MCP client not connected.")
         
+        from mcp.types import TextContent
+
         # 1. Get prompt by name
         prompt_result: GetPromptResult = await self.session.get_prompt(name)
         
@@ -1,6 +1,6 @@
 from enum import StrEnum
 from typing import Any
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 
 class Role(StrEnum):
@@ -11,13 +11,22 @@ class Role(StrEnum):
 
 
 class Message(BaseModel):
+    # Frozen: the serialized form is computed only once, a changed field would otherwise be sent and persisted stale
+    model_config = ConfigDict(frozen=True)
+
     role: Role
     content: str | None = None
     tool_call_id: str | None = None
     name: str | None = None
     tool_calls: list[dict[str, Any]] | None = None
 
+    _serialized: dict[str, Any] | None = PrivateAttr(default=None)
+
     def to_dict(self) -> dict[str, Any]:
+        # Copies of the cached dict are handed out, request payloads and the store must not share (and mutate) it
+        if self._serialized is not None:
+            return dict(self._serialized)
+
         result = {"role": str(self.role.value)}
         if self.content:
             result["content"] = self.content
@@ -27,4 +36,18 @@ class Message(BaseModel):
             result["tool_call_id"] = self.tool_call_id
         if self.tool_calls:
             result["tool_calls"] = self.tool_calls
-        return result
+        self._serialized = result
+        return dict(result)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Message":
+        """Restore a message produced by `to_dict` without re-running validation"""
+        message = cls.model_construct(
+            role=Role(data["role"]),
+            content=data.get("content"),
+            tool_call_id=data.get("tool_call_id"),
+            name=data.get("name"),
+            tool_calls=data.get("tool_calls"),
+        )
+        message._serialized = dict(data)
+        return message
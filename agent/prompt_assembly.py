@@ -0,0 +1,80 @@
+import re
+from typing import Any, Iterable
+
+from conversation_store import LazyMessageList
+from mcp_client import MCPClient
+from models.message import Message, Role
+
+# MCP prompt name -> user intent that calls for it
+GUIDANCE_INTENTS = {
+    # Statistics questions ("how many users per gender") are answered by aggregate_users and do not match
+    "search_guidance": re.compile(
+        r"\b(search|find|look(ing)? (for|up)|list|show|users? (named|called|with (the )?(name|surname|email)))\b",
+        re.IGNORECASE
+    ),
+    "user_creation_guidance": re.compile(
+        r"\b(add|create|new (user|profile)|register|generate|sign up)\b",
+        re.IGNORECASE
+    ),
+}
+
+GUIDANCE_HEADER = "Guidance for {name}:\n"
+
+
+def canonical_tools(tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Tools sorted by name with sorted keys, so the serialized tool schemas are byte-stable between runs"""
+
+    def canonical(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: canonical(value[key]) for key in sorted(value)}
+        if isinstance(value, list):
+            return [canonical(item) for item in value]
+        return value
+
+    return [canonical(tool) for tool in sorted(tools, key=lambda tool: tool["function"]["name"])]
+
+
+class PromptAssembler:
+    """
+    Builds a deterministic prompt prefix (system prompt, then pinned guidance sorted by name) so provider-side
+    prompt caching hits, and loads the remaining MCP guidance prompts only when a user turn calls for them.
+    Guidance is appended to the history right before the user message that needed it, so the prefix never changes.
+    """
+
+    def __init__(self, system_prompt: str, prompt_sources: dict[str, MCPClient], pinned: Iterable[str] = ()) -> None:
+        self.system_prompt = system_prompt
+        self.prompt_sources = prompt_sources
+        self.pinned = sorted(name for name in pinned if name in prompt_sources)
+        self._loaded: set[str] = set()
+        self._contents: dict[str, str] = {}
+
+    async def build_prefix(self) -> list[Message]:
+        """Messages a new conversation starts with"""
+        messages = [Message(role=Role.SYSTEM, content=self.system_prompt)]
+        for name in self.pinned:
+            messages.append(await self._guidance_message(name))
+        return messages
+
+    def restore(self, messages: Iterable[Message]) -> None:
+        """Remember which guidance a resumed conversation already contains"""
+        for name in self.prompt_sources:
+            header = GUIDANCE_HEADER.format(name=name)
+            # A lazily loaded history is scanned without parsing every stored message
+            candidates = messages.search(header) if isinstance(messages, LazyMessageList) else messages
+            if any(message.role == Role.USER and (message.content or "").startswith(header) for message in candidates):
+                self._loaded.add(name)
+
+    async def guidance_for(self, user_input: str) -> list[Message]:
+        """Guidance messages the user input calls for that are not in the conversation yet"""
+        messages = []
+        for name, intent in GUIDANCE_INTENTS.items():
+            if name in self.prompt_sources and name not in self._loaded and intent.search(user_input):
+                print(f"    💡 Loading guidance: {name}")
+                messages.append(await self._guidance_message(name))
+        return messages
+
+    async def _guidance_message(self, name: str) -> Message:
+        if name not in self._contents:
+            self._contents[name] = await self.prompt_sources[name].get_prompt(name)
+        self._loaded.add(name)
+        return Message(role=Role.USER, content=GUIDANCE_HEADER.format(name=name) + self._contents[name])
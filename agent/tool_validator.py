@@ -0,0 +1,279 @@
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, json from the standard library is used instead
+    orjson = None
+
+# Returns the list of validation errors for a value at the given path
+Validator = Callable[[Any, str], list[str]]
+
+
+class ToolArgumentsError(Exception):
+    pass
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return True
+    if isinstance(value, float):
+        return value.is_integer()
+    # Pydantic (lax mode) on the server accepts numeric strings, so they are not rejected here either
+    return isinstance(value, str) and value.strip().lstrip("+-").isdigit()
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if isinstance(value, str):
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": _is_integer,
+    "number": _is_number,
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+
+def parse_arguments(raw_arguments: str | None) -> dict[str, Any]:
+    """Parse tool call arguments produced by the model into a dict"""
+    if not raw_arguments or not raw_arguments.strip():
+        return {}
+    try:
+        arguments = orjson.loads(raw_arguments) if orjson else json.loads(raw_arguments)
+    except ValueError as e:
+        raise ToolArgumentsError(f"Arguments are not valid JSON: {e}")
+    if not isinstance(arguments, dict):
+        raise ToolArgumentsError(f"Arguments must be a JSON object, got {_json_type(arguments)}")
+    return arguments
+
+
+def compile_schema(schema: dict[str, Any]) -> Callable[[dict[str, Any]], None]:
+    """
+    Compile a tool `inputSchema` (JSON Schema as generated by Pydantic) into a validator function.
+    The validator raises ToolArgumentsError listing every violation.
+    """
+    definitions = schema.get("$defs") or schema.get("definitions") or {}
+    compiled_refs: dict[str, Validator] = {}
+    validate = _compile(schema, definitions, compiled_refs)
+
+    def validator(arguments: dict[str, Any]) -> None:
+        errors = validate(arguments, "")
+        if errors:
+            raise ToolArgumentsError("Invalid arguments:\n" + "\n".join(f"- {error}" for error in errors))
+
+    return validator
+
+
+def _path(path: str, key: str | int) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+
+def _describe(path: str) -> str:
+    return path or "arguments"
+
+
+def _compile(schema: dict[str, Any] | bool, definitions: dict[str, Any], compiled_refs: dict[str, Validator]) -> Validator:
+    if schema is True or schema == {}:
+        return lambda value, path: []
+    if schema is False:
+        return lambda value, path: [f"{_describe(path)}: no value is allowed here"]
+
+    if "$ref" in schema:
+        return _compile_ref(schema["$ref"], definitions, compiled_refs)
+
+    checks: list[Validator] = []
+
+    if "type" in schema:
+        types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        type_checks = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+        expected = " or ".join(types)
+
+        def check_type(value, path):
+            if any(check(value) for check in type_checks):
+                return []
+            return [f"{_describe(path)}: expected {expected}, got {_json_type(value)}"]
+
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+        checks.append(
+            lambda value, path: [] if value in allowed else [f"{_describe(path)}: must be one of {allowed}, got {value!r}"]
+        )
+
+    if "const" in schema:
+        const = schema["const"]
+        checks.append(lambda value, path: [] if value == const else [f"{_describe(path)}: must be {const!r}"])
+
+    for keyword in ("anyOf", "oneOf"):
+        if keyword in schema:
+            options = [_compile(option, definitions, compiled_refs) for option in schema[keyword]]
+
+            def check_any(value, path, options=options):
+                option_errors = [option(value, path) for option in options]
+                if any(not errors for errors in option_errors):
+                    return []
+                # Report the closest option: the fewest violations among options of the matching type
+                type_error = f"{_describe(path)}: expected "
+                matching = [errors for errors in option_errors if not errors[0].startswith(type_error)]
+                if matching:
+                    return min(matching, key=len)
+                expected = " or ".join(errors[0][len(type_error):].split(", got ")[0] for errors in option_errors)
+                return [f"{type_error}{expected}, got {_json_type(value)}"]
+
+            checks.append(check_any)
+
+    if "allOf" in schema:
+        parts = [_compile(part, definitions, compiled_refs) for part in schema["allOf"]]
+        checks.append(lambda value, path: [error for part in parts for error in part(value, path)])
+
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        checks.append(_compile_object(schema, definitions, compiled_refs))
+
+    if "items" in schema:
+        item_validator = _compile(schema["items"], definitions, compiled_refs)
+
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return []
+            return [error for i, item in enumerate(value) for error in item_validator(item, _path(path, i))]
+
+        checks.append(check_items)
+
+    checks.extend(_compile_bounds(schema))
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path):
+        errors = []
+        for check in checks:
+            errors.extend(check(value, path))
+            # Nested checks are meaningless once the type itself is wrong
+            if errors and check is checks[0] and "type" in schema:
+                break
+        return errors
+
+    return check_all
+
+
+def _compile_ref(ref: str, definitions: dict[str, Any], compiled_refs: dict[str, Validator]) -> Validator:
+    if ref in compiled_refs:
+        return compiled_refs[ref]
+
+    name = ref.rsplit("/", 1)[-1]
+    if name not in definitions:
+        raise ValueError(f"Unresolvable schema reference: {ref}")
+
+    # Register a late-bound placeholder first so recursive models do not recurse forever
+    resolved: list[Validator] = []
+    compiled_refs[ref] = lambda value, path: resolved[0](value, path)
+    resolved.append(_compile(definitions[name], definitions, compiled_refs))
+    compiled_refs[ref] = resolved[0]
+    return resolved[0]
+
+
+def _compile_object(schema: dict[str, Any], definitions: dict[str, Any], compiled_refs: dict[str, Validator]) -> Validator:
+    properties = {
+        name: _compile(property_schema, definitions, compiled_refs)
+        for name, property_schema in schema.get("properties", {}).items()
+    }
+    required = schema.get("required", [])
+    additional = schema.get("additionalProperties", True)
+    additional_validator = _compile(additional, definitions, compiled_refs) if isinstance(additional, dict) else None
+
+    def check_object(value, path):
+        if not isinstance(value, dict):
+            return []
+        errors = [f"{_describe(_path(path, name))}: required property is missing" for name in required if name not in value]
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(properties[key](item, _path(path, key)))
+            elif additional is False:
+                errors.append(f"{_describe(_path(path, key))}: unknown property, expected one of {list(properties)}")
+            elif additional_validator is not None:
+                errors.extend(additional_validator(item, _path(path, key)))
+        return errors
+
+    return check_object
+
+
+def _compile_bounds(schema: dict[str, Any]) -> list[Validator]:
+    checks: list[Validator] = []
+    if "minLength" in schema or "maxLength" in schema:
+        min_length, max_length = schema.get("minLength", 0), schema.get("maxLength")
+
+        def check_length(value, path):
+            if not isinstance(value, str):
+                return []
+            if len(value) < min_length or (max_length is not None and len(value) > max_length):
+                return [f"{_describe(path)}: length must be between {min_length} and {max_length or 'unlimited'}"]
+            return []
+
+        checks.append(check_length)
+
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    exclusive_minimum, exclusive_maximum = schema.get("exclusiveMinimum"), schema.get("exclusiveMaximum")
+    # Draft 4 uses booleans that make minimum/maximum exclusive, later drafts give the exclusive bounds as numbers
+    if isinstance(exclusive_minimum, bool):
+        minimum, exclusive_minimum = (None, minimum) if exclusive_minimum else (minimum, None)
+    if isinstance(exclusive_maximum, bool):
+        maximum, exclusive_maximum = (None, maximum) if exclusive_maximum else (maximum, None)
+
+    if any(bound is not None for bound in (minimum, maximum, exclusive_minimum, exclusive_maximum)):
+        def check_range(value, path):
+            if not _TYPE_CHECKS["number"](value):
+                return []
+            # Numeric strings are accepted by the server (Pydantic lax mode), so they are compared as numbers
+            number = float(value)
+            failed = []
+            if minimum is not None and number < minimum:
+                failed.append(f">= {minimum}")
+            if exclusive_minimum is not None and number <= exclusive_minimum:
+                failed.append(f"> {exclusive_minimum}")
+            if maximum is not None and number > maximum:
+                failed.append(f"<= {maximum}")
+            if exclusive_maximum is not None and number >= exclusive_maximum:
+                failed.append(f"< {exclusive_maximum}")
+            if failed:
+                return [f"{_describe(path)}: must be {' and '.join(failed)}, got {value}"]
+            return []
+
+        checks.append(check_range)
+    return checks
+
+
+def _json_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if value is None:
+        return "null"
+    return type(value).__name__
@@ -0,0 +1,190 @@
+"""
+Throughput of the bulk export resources and the import_users pipeline (mcp_server/user_bulk.py).
+
+Starts a local stub of the User Service with generated users in a subprocess, then measures:
+- export: paging the whole dataset as JSONL and CSV (users/s, MB/s, largest page)
+- import: parsing and validating the export (dry run), and writing it back with each concurrency level
+
+Scheduler limits are lifted by default to measure the pipeline itself, pass `--global-rate 50` to see the
+throughput with the server's default rate limit. The stub answers instantly, so the import is CPU bound and concurrency
+does not help; pass `--latency-ms 20` to simulate a networked user service, where it does.
+
+Usage (the scheduler imports the shared profiler, so shared/ goes on PYTHONPATH like in start_server.sh):
+    PYTHONPATH=shared python benchmarks/bulk_import_export.py [--users 10000] [--page-size 1000] [--concurrency 1 4 8]
+    PYTHONPATH=shared python benchmarks/bulk_import_export.py --users 100000 --concurrency 8
+    PYTHONPATH=shared python benchmarks/bulk_import_export.py --users 2000 --latency-ms 20 --concurrency 1 2 4 8
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import socket
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "mcp_server"))
+
+from fake_users import generate_users  # noqa: E402
+
+
+def serve_stub(port: int, user_count: int, latency: float) -> None:
+    """Minimal in-memory User Service: search (no filters) and create are all the bulk pipeline needs"""
+    users = {user["id"]: user for user in generate_users(user_count)}
+    next_id = [user_count + 1]
+
+    class StubUserServiceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes, without TCP_NODELAY keep-alive requests stall on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status: int, body: Any) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path.startswith("/v1/users/search"):
+                return self.send_json(200, list(users.values()))
+            match = re.match(r"/v1/users/(\d+)$", self.path)
+            if match and int(match[1]) in users:
+                return self.send_json(200, users[int(match[1])])
+            self.send_json(404, {"detail": "User not found"})
+
+        def do_POST(self):
+            time.sleep(latency)
+            user = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            user["id"] = next_id[0]
+            next_id[0] += 1
+            users[user["id"]] = user
+            self.send_json(201, user)
+
+    ThreadingHTTPServer(("127.0.0.1", port), StubUserServiceHandler).serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Stub user service did not start on port {port}")
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def export_all(exporter, fmt: str) -> tuple[list[str], float]:
+    pages = []
+    after_id = 0
+    started = time.perf_counter()
+    while True:
+        page = await exporter.page(fmt, after_id)
+        rows = page.splitlines()[1:] if fmt == "csv" else page.splitlines()
+        if not rows:
+            break
+        pages.append(page)
+        last = rows[-1]
+        after_id = json.loads(last)["id"] if fmt == "jsonl" else int(last.split(",", 1)[0])
+    return pages, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> None:
+    # Imported after USERS_MANAGEMENT_SERVICE_URL points to the stub
+    from request_scheduler import RequestScheduler
+    from user_bulk import UserExporter, UserImporter
+    from user_client import UserClient
+    from user_snapshot import UserSnapshot
+
+    user_client = UserClient()
+    scheduler = RequestScheduler(
+        max_concurrency=max(args.concurrency),
+        max_queue_depth=max(args.concurrency) * 2,
+        global_rate=args.global_rate,
+        global_burst=args.global_rate * 2,
+        max_wait=60,
+    )
+    snapshot = UserSnapshot(
+        load_users=lambda: scheduler.read("benchmark", ("get_all_users",), user_client.get_all_users),
+        ttl_seconds=3600,
+    )
+    exporter = UserExporter(snapshot, page_size=args.page_size)
+
+    started = time.perf_counter()
+    summary = await exporter.summary()
+    print(f"snapshot: {summary['total_users']} users loaded in {time.perf_counter() - started:.2f}s\n")
+
+    print(f"{'export':<10}{'pages':>8}{'seconds':>10}{'users/s':>12}{'MB':>8}{'MB/s':>8}{'max page MB':>13}")
+    jsonl_pages = []
+    for fmt in ("jsonl", "csv"):
+        pages, elapsed = await export_all(exporter, fmt)
+        sizes = [len(page.encode()) / 2 ** 20 for page in pages]
+        print(
+            f"{fmt:<10}{len(pages):>8}{elapsed:>10.2f}{summary['total_users'] / elapsed:>12.0f}"
+            f"{sum(sizes):>8.1f}{sum(sizes) / elapsed:>8.1f}{max(sizes):>13.2f}"
+        )
+        if fmt == "jsonl":
+            jsonl_pages = pages
+
+    payload = "".join(jsonl_pages)
+    print(f"\n{'import':<24}{'seconds':>10}{'users/s':>12}{'failed':>8}")
+    report = await UserImporter(scheduler, user_client.add_user).run("benchmark", payload, "jsonl", dry_run=True)
+    print(f"{'validate only':<24}{report.elapsed:>10.2f}{report.total / report.elapsed:>12.0f}{len(report.errors):>8}")
+    for concurrency in args.concurrency:
+        importer = UserImporter(scheduler, user_client.add_user, max_concurrency=concurrency)
+        report = await importer.run("benchmark", payload, "jsonl")
+        label = f"write, concurrency {concurrency}"
+        print(f"{label:<24}{report.elapsed:>10.2f}{report.imported / report.elapsed:>12.0f}{len(report.errors):>8}")
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"\npeak RSS: {rss:.0f} MB (includes the {len(payload) / 2 ** 20:.1f} MB import payload)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--global-rate", type=float, default=1e9, help="scheduler requests per second")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated user service latency per created user")
+    args = parser.parse_args()
+
+    port = free_port()
+    stub = multiprocessing.Process(target=serve_stub, args=(port, args.users, args.latency_ms / 1000), daemon=True)
+    stub.start()
+    try:
+        wait_for_port(port)
+        os.environ["USERS_MANAGEMENT_SERVICE_URL"] = f"http://127.0.0.1:{port}"
+        print(f"🧪 Stub user service with {args.users} users on port {port}")
+        asyncio.run(run(args))
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Local fake of a DIAL/Azure OpenAI chat completions deployment, for exercising LLMRouter without real endpoints.
+
+Streams a canned answer (a `get_user_by_id` tool call for user messages, text otherwise) after an optional
+delay, or fails every request with the given status code and retry-after header.
+
+Usage:
+    python benchmarks/fake_dial_endpoint.py --port 9101                         # fast deployment
+    python benchmarks/fake_dial_endpoint.py --port 9102 --delay 3               # slow deployment
+    python benchmarks/fake_dial_endpoint.py --port 9103 --status 429 --retry-after 5
+
+    DIAL_DEPLOYMENTS='[{"name": "fast", "endpoint": "http://127.0.0.1:9101"},
+                       {"name": "slow", "endpoint": "http://127.0.0.1:9102"},
+                       {"name": "throttled", "endpoint": "http://127.0.0.1:9103"}]' \\
+    DIAL_HEDGE_AFTER_SECONDS=1 python agent/app.py
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_chunk(delta: dict, finish_reason: str | None = None) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def make_handler(name: str, delay: float, status: int, retry_after: float):
+    class FakeDeploymentHandler(BaseHTTPRequestHandler):
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+            if status != 200:
+                payload = json.dumps({"error": {"message": f"{name} fails with {status}", "code": str(status)}}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("retry-after", str(retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+
+            if body["messages"][-1]["role"] == "user":
+                chunks = [
+                    make_chunk({"role": "assistant", "tool_calls": [{
+                        "index": 0, "id": "call_fake", "type": "function",
+                        "function": {"name": "get_user_by_id", "arguments": ""},
+                    }]}),
+                    make_chunk({"tool_calls": [{"index": 0, "function": {"arguments": "{\"user_id\": "}}]}),
+                    make_chunk({"tool_calls": [{"index": 0, "function": {"arguments": "1}"}}]}),
+                    make_chunk({}, "tool_calls"),
+                ]
+            else:
+                chunks = [
+                    make_chunk({"role": "assistant", "content": f"[{name}] "}),
+                    make_chunk({"content": "Here is the user you asked for."}),
+                    make_chunk({}, "stop"),
+                ]
+
+            for chunk in chunks:
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return FakeDeploymentHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--name", default=None)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before the first chunk")
+    parser.add_argument("--status", type=int, default=200, help="fail every request with this status")
+    parser.add_argument("--retry-after", type=float, default=5.0)
+    args = parser.parse_args()
+
+    name = args.name or f"fake-{args.port}"
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(name, args.delay, args.status, args.retry_after))
+    print(f"🧪 {name} listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Deterministic synthetic users in the User Service format, shared by the benchmarks"""
+import random
+from typing import Any
+
+
+def generate_users(count: int) -> list[dict[str, Any]]:
+    rnd = random.Random(42)
+    users = []
+    for user_id in range(1, count + 1):
+        users.append({
+            "id": user_id,
+            "name": rnd.choice(["John", "Jane", "Mike", "Anna", "Oleksandr", "Maria"]),
+            "surname": rnd.choice(["Smith", "Doe", "Brown", "Kowalski", "Shevchenko"]),
+            "email": f"user{user_id}@example.com",
+            "phone": rnd.choice([None, f"+1555{user_id:07d}"]),
+            "date_of_birth": f"{rnd.randint(1950, 2005)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "address": {
+                "country": rnd.choice(["United States", "Poland", "Ukraine", "Germany"]),
+                "city": rnd.choice(["Austin", "Krakow", "Kyiv", "Berlin"]),
+                "street": f"{rnd.randint(1, 200)} Main Street",
+                "flat_house": f"Apt {rnd.randint(1, 300)}",
+            },
+            "gender": rnd.choice(["male", "female", "other", "prefer_not_to_say"]),
+            "company": rnd.choice([None, "Acme", "Globex", "Initech"]),
+            "salary": rnd.choice([None, float(rnd.randint(30, 200) * 1000)]),
+            "about_me": "I'm a curious person who loves hiking, chess and baking. I want to visit every national park.",
+            "credit_card": {"num": "4111-1111-1111-1111", "cvv": "123", "exp_date": "01/2030"},
+            "created_at": "2024-05-01T12:00:00",
+        })
+    return users
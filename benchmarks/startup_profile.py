@@ -0,0 +1,116 @@
+"""
+Startup-time profile and regression check for the agent and MCP server entry points.
+
+Imports each entry point module in a fresh interpreter with `-X importtime`, prints the
+heaviest imports and fails with exit code 1 when the median import time exceeds its budget.
+Imports are measured with bytecode caches in place, the same path as the server image that
+precompiles its bytecode at build time.
+
+Usage:
+    python benchmarks/startup_profile.py [--runs 5] [--top 15] [--agent-budget-ms 300] [--server-budget-ms 800]
+
+Run it with the same virtual environment that is used to run the agent and the server.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name -> (working directory, module to import, budget env variable, default budget in ms)
+ENTRY_POINTS = {
+    "agent": (ROOT / "agent", "app", "AGENT_STARTUP_BUDGET_MS", 300.0),
+    "mcp_server": (ROOT / "mcp_server", "server", "SERVER_STARTUP_BUDGET_MS", 800.0),
+}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) tuples"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        records.append((module.rstrip(), int(self_us), int(cumulative_us)))
+    return records
+
+
+def profile_once(cwd: Path, module: str) -> tuple[float, float, list[tuple[str, int, int]]]:
+    """Import the module in a fresh interpreter, return (wall ms, import ms, import records)"""
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    # Same PYTHONPATH as the start scripts, the entry points import the shared modules
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "shared"), env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    records = parse_importtime(result.stderr)
+    import_ms = next(cumulative for name, _, cumulative in reversed(records) if name.strip() == module) / 1000
+    return wall_ms, import_ms, records
+
+
+def report(name: str, runs: int, top: int, budget_ms: float) -> bool:
+    cwd, module, _, _ = ENTRY_POINTS[name]
+    # The first run writes the bytecode caches (like the image build does) and warms the filesystem cache, it is not counted
+    profile_once(cwd, module)
+    samples = [profile_once(cwd, module) for _ in range(runs)]
+
+    wall_ms = statistics.median(sample[0] for sample in samples)
+    import_ms = statistics.median(sample[1] for sample in samples)
+    records = samples[-1][2]
+
+    print(f"=== {name} ({module}) ===")
+    print(f"  process wall time: {wall_ms:8.1f} ms (median of {runs})")
+    print(f"  import time:       {import_ms:8.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"  top {top} imports by self time:")
+    for module_name, self_us, cumulative_us in sorted(records, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"    {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {module_name.strip()}")
+    print()
+
+    if import_ms > budget_ms:
+        print(f"❌ {name} startup regression: {import_ms:.1f} ms > {budget_ms:.0f} ms budget\n")
+        return False
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--agent-budget-ms", type=float)
+    parser.add_argument("--server-budget-ms", type=float)
+    parser.add_argument("targets", nargs="*", default=list(ENTRY_POINTS), help=f"any of {', '.join(ENTRY_POINTS)}")
+    args = parser.parse_args()
+
+    unknown = set(args.targets) - set(ENTRY_POINTS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    budgets = {
+        "agent": args.agent_budget_ms,
+        "mcp_server": args.server_budget_ms,
+    }
+
+    passed = True
+    for name in args.targets:
+        _, _, budget_env, default_budget = ENTRY_POINTS[name]
+        budget_ms = budgets[name] or float(os.getenv(budget_env, default_budget))
+        passed &= report(name, args.runs, args.top, budget_ms)
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Compares the compact user wire format (mcp_server/user_format.py) with the previous verbose format.
+
+Reports tokens per user for both formats. Tokens are counted with `tiktoken` (o200k_base, the gpt-4o
+encoding) when it is installed, otherwise estimated as characters / 4.
+With `--live` it also sends a question over the records to DIAL (DIAL_API_KEY and DIAL_ENDPOINT must be set)
+and reports the prompt tokens billed by the model and the end-to-end completion latency of each format.
+
+Usage:
+    python benchmarks/user_format.py [--users 100] [--from-service] [--live] [--repeat 3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "mcp_server"))
+
+from fake_users import generate_users  # noqa: E402
+from user_format import USER_FORMAT_LEGEND, encode_users  # noqa: E402
+
+QUESTION = "Which of these users work at Acme? Answer with their ids only."
+
+
+def legacy_users_to_string(users: list[dict[str, Any]]) -> str:
+    """The format UserClient used before the compact encoding"""
+    users_str = ""
+    for user in users:
+        users_str += "```\n"
+        for key, value in user.items():
+            users_str += f"  {key}: {value}\n"
+        users_str += "```\n"
+    return users_str + "\n"
+
+
+def fetch_users(count: int) -> list[dict[str, Any]]:
+    endpoint = os.getenv("USERS_MANAGEMENT_SERVICE_URL", "http://localhost:8041")
+    with urllib.request.urlopen(f"{endpoint}/v1/users/search") as response:
+        return json.load(response)[:count]
+
+
+def token_counter() -> tuple[str, Callable[[str], int]]:
+    try:
+        import tiktoken
+    except ImportError:
+        return "chars/4 estimate", lambda text: (len(text) + 3) // 4
+    encoding = tiktoken.get_encoding("o200k_base")
+    return "tiktoken o200k_base", lambda text: len(encoding.encode(text))
+
+
+async def measure_completion(system_prompt: str, payload: str, repeat: int) -> tuple[int, float]:
+    """Return (prompt tokens, median seconds) of a completion that answers QUESTION over the payload"""
+    from openai import AsyncAzureOpenAI
+
+    client = AsyncAzureOpenAI(
+        api_key=os.environ["DIAL_API_KEY"],
+        azure_endpoint=os.environ["DIAL_ENDPOINT"],
+        api_version="2025-01-01-preview"
+    )
+    latencies = []
+    prompt_tokens = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
+            model="gpt-4o",
+            temperature=0.0,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"{payload}\n\n{QUESTION}"},
+            ],
+        )
+        latencies.append(time.perf_counter() - started)
+        prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+    return prompt_tokens, statistics.median(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--from-service", action="store_true", help="use users from the running User Service")
+    parser.add_argument("--live", action="store_true", help="measure real completions against DIAL")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    users = fetch_users(args.users) if args.from_service else generate_users(args.users)
+    counter_name, count_tokens = token_counter()
+
+    formats = {
+        "verbose": ("You are a User Management Agent.", legacy_users_to_string(users)),
+        "compact": (f"You are a User Management Agent. {USER_FORMAT_LEGEND}", encode_users(users)),
+    }
+
+    print(f"{len(users)} users, tokens counted with {counter_name}")
+    print(f"legend (sent once with tool descriptions): {count_tokens(USER_FORMAT_LEGEND)} tokens\n")
+    print(f"{'format':<10}{'tokens':>10}{'tokens/user':>14}{'chars':>10}")
+    baseline = None
+    for name, (_, payload) in formats.items():
+        tokens = count_tokens(payload)
+        baseline = baseline or tokens
+        print(f"{name:<10}{tokens:>10}{tokens / len(users):>14.1f}{len(payload):>10}  ({tokens / baseline:.0%})")
+
+    if args.live:
+        print(f"\nEnd-to-end completion ({args.repeat} runs each):")
+        for name, (system_prompt, payload) in formats.items():
+            prompt_tokens, latency = asyncio.run(measure_completion(system_prompt, payload, args.repeat))
+            print(f"{name:<10} prompt tokens {prompt_tokens:>8}   median latency {latency:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from profiling import Profiler
+
+T = TypeVar("T")
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class SchedulerOverloaded(Exception):
+    pass
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second refill up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> float:
+        """Take one token, return 0 on success or the number of seconds until a token is available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class RequestScheduler:
+    """
+    Admission control in front of the user service:
+    - identical in-flight reads are coalesced into a single upstream request (single-flight)
+    - per-session and global token buckets limit the request rate
+    - a bounded number of upstream requests run concurrently, the rest wait in a bounded queue
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "8")),
+            max_queue_depth: int = int(os.getenv("SCHEDULER_MAX_QUEUE_DEPTH", "100")),
+            global_rate: float = float(os.getenv("SCHEDULER_GLOBAL_RATE", "50")),
+            global_burst: float = float(os.getenv("SCHEDULER_GLOBAL_BURST", "100")),
+            session_rate: float = float(os.getenv("SCHEDULER_SESSION_RATE", "5")),
+            session_burst: float = float(os.getenv("SCHEDULER_SESSION_BURST", "20")),
+            max_wait: float = float(os.getenv("SCHEDULER_MAX_WAIT_SECONDS", "5")),
+            profiler: Profiler | None = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_wait = max_wait
+        self.profiler = profiler
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._global_bucket = TokenBucket(global_rate, global_burst)
+        self._session_buckets: dict[str, TokenBucket] = {}
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+        self._queued = 0
+        self._running = 0
+        self._stats = {
+            "requests": 0,
+            "upstream_requests": 0,
+            "coalesced": 0,
+            "rate_limited": 0,
+            "rejected_overloaded": 0,
+            "upstream_errors": 0,
+            "max_queue_depth_seen": 0,
+        }
+
+    async def read(self, session_key: str, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Run an idempotent read, sharing the upstream request with identical in-flight reads"""
+        await self.admit(session_key)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+            # shield: a cancelled waiter must not cancel the request other waiters depend on
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._run_upstream(call))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def write(self, session_key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run a non-idempotent request, never coalesced"""
+        await self.admit(session_key)
+        return await self._run_upstream(call)
+
+    async def write_batch(
+            self,
+            calls: list[Callable[[], Awaitable[T]]],
+            max_concurrency: int,
+    ) -> list[T | Exception]:
+        """
+        Run many non-idempotent requests without charging the session (bulk imports admit it once per import),
+        global limits apply to every request. Returns the result or the exception of every call, in order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(call: Callable[[], Awaitable[T]]) -> T | Exception:
+            async with semaphore:
+                try:
+                    return await self._run_upstream(call)
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(run(call) for call in calls))
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            **self._stats,
+            "queue_depth": self._queued,
+            "running": self._running,
+            "in_flight_keys": len(self._in_flight),
+            "sessions": len(self._session_buckets),
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    async def admit(self, session_key: str) -> None:
+        """Apply the per-session rate limit to a request (reads and writes do it themselves)"""
+        self._stats["requests"] += 1
+        await self._acquire_token(self._session_bucket(session_key), f"session {session_key}")
+
+    async def _run_upstream(self, call: Callable[[], Awaitable[T]]) -> T:
+        if self._queued >= self.max_queue_depth:
+            self._stats["rejected_overloaded"] += 1
+            raise SchedulerOverloaded(
+                f"User service is overloaded ({self._queued} requests queued), please retry later"
+            )
+
+        self._queued += 1
+        self._stats["max_queue_depth_seen"] = max(self._stats["max_queue_depth_seen"], self._queued)
+        try:
+            async with self._trace("scheduler_wait"):
+                await self._acquire_token(self._global_bucket, "global")
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._stats["rejected_overloaded"] += 1
+            raise SchedulerOverloaded(f"Timed out after {self.max_wait}s waiting for the user service, please retry later")
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        self._stats["upstream_requests"] += 1
+        try:
+            async with self._trace("user_service"):
+                return await call()
+        except Exception:
+            self._stats["upstream_errors"] += 1
+            raise
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    def _trace(self, name: str) -> contextlib.AbstractAsyncContextManager:
+        return self.profiler.trace(name) if self.profiler is not None else contextlib.nullcontext()
+
+    async def _acquire_token(self, bucket: TokenBucket, scope: str) -> None:
+        # Short waits smooth out bursts, waits longer than max_wait are rejected right away
+        delay = bucket.try_acquire()
+        while delay:
+            if delay > self.max_wait:
+                self._stats["rate_limited"] += 1
+                raise RateLimitExceeded(f"Rate limit exceeded ({scope}), retry in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = bucket.try_acquire()
+
+    def _session_bucket(self, session_key: str) -> TokenBucket:
+        bucket = self._session_buckets.get(session_key)
+        if bucket is None:
+            if len(self._session_buckets) >= 10_000:
+                # Forget idle sessions, a full bucket behaves exactly like a new one
+                self._session_buckets = {k: b for k, b in self._session_buckets.items() if not b.is_full}
+            bucket = TokenBucket(self.session_rate, self.session_burst)
+            self._session_buckets[session_key] = bucket
+        return bucket
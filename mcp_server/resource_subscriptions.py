@@ -0,0 +1,98 @@
+import weakref
+from typing import Any, Iterable
+from urllib.parse import parse_qsl
+
+from mcp.server.session import ServerSession
+from pydantic import AnyUrl
+
+USER_URI_PREFIX = "users-management://users/"
+SEARCH_URI_PREFIX = "users-management://users/search/"
+
+SEARCH_FIELDS = ("name", "surname", "email", "gender")
+
+
+def user_uri(user_id: int | str) -> str:
+    return f"{USER_URI_PREFIX}{user_id}"
+
+
+def parse_search_query(query: str) -> dict[str, str]:
+    """Parse the query part of a search resource URI (`name=john&gender=male`) into search parameters"""
+    params = dict(parse_qsl(query, keep_blank_values=False))
+    unknown = params.keys() - set(SEARCH_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown search parameters: {', '.join(sorted(unknown))}, expected: {', '.join(SEARCH_FIELDS)}")
+    return params
+
+
+def search_matches(params: dict[str, str], user: dict[str, Any]) -> bool:
+    """Same matching rules as the user service: partial case-insensitive match, exact match for gender"""
+    for field, expected in params.items():
+        value = str(user.get(field) or "").lower()
+        if field == "gender" and value != expected.lower():
+            return False
+        if field != "gender" and expected.lower() not in value:
+            return False
+    return True
+
+
+def validate_subscription_uri(uri: str) -> None:
+    """Only user and search resources can be subscribed to, search queries are checked up front"""
+    if uri.startswith(SEARCH_URI_PREFIX):
+        parse_search_query(uri[len(SEARCH_URI_PREFIX):])
+    elif not (uri.startswith(USER_URI_PREFIX) and uri[len(USER_URI_PREFIX):].isdigit()):
+        raise ValueError(
+            f"Cannot subscribe to {uri}, subscribable resources: {USER_URI_PREFIX}{{user_id}}, {SEARCH_URI_PREFIX}{{query}}"
+        )
+
+
+class SubscriptionManager:
+    """Tracks which MCP sessions subscribed to which resource URIs and sends them `resources/updated` notifications"""
+
+    def __init__(self) -> None:
+        # Sessions are held weakly, a closed session disappears from every subscription on its own
+        self._subscribers: dict[str, weakref.WeakSet[ServerSession]] = {}
+
+    def subscribe(self, uri: str, session: ServerSession) -> None:
+        validate_subscription_uri(uri)
+        self._subscribers.setdefault(uri, weakref.WeakSet()).add(session)
+
+    def unsubscribe(self, uri: str, session: ServerSession) -> None:
+        sessions = self._subscribers.get(uri)
+        if sessions is not None:
+            sessions.discard(session)
+            if not sessions:
+                del self._subscribers[uri]
+
+    def subscribed_search_uris(self) -> list[str]:
+        return [uri for uri in self._subscribers if uri.startswith(SEARCH_URI_PREFIX)]
+
+    async def notify(self, uris: Iterable[str]) -> None:
+        """Send `resources/updated` for every URI to the sessions subscribed to it, failures are only logged"""
+        for uri in uris:
+            for session in list(self._subscribers.get(uri, ())):
+                try:
+                    await session.send_resource_updated(AnyUrl(uri))
+                except Exception as e:
+                    print(f"Dropping subscription to {uri}, notification failed: {e}")
+                    self.unsubscribe(uri, session)
+
+    async def notify_user_changed(self, user_id: int | None = None, user: dict[str, Any] | None = None) -> None:
+        """
+        Notify subscribers of resources a write may have changed: the user resource, and search resources.
+        When the written user data is known (add) only searches it matches are notified, otherwise
+        (update, delete) the previous values are unknown and every subscribed search is notified.
+        Never raises: the write has already happened, a notification problem must not turn it into an error.
+        """
+        try:
+            uris = [user_uri(user_id)] if user_id is not None else []
+            for uri in self.subscribed_search_uris():
+                try:
+                    matches = user is None or search_matches(parse_search_query(uri[len(SEARCH_URI_PREFIX):]), user)
+                except ValueError as e:
+                    print(f"Notifying {uri} anyway, cannot match it against the written user: {e}")
+                    matches = True
+                if matches:
+                    uris.append(uri)
+            await self.notify(uris)
+        except Exception as e:
+            print(f"Failed to notify subscribers about the change of user {user_id}: {e}")
@@ -1,9 +1,19 @@
+import json
 from pathlib import Path
+from typing import Literal
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic import AnyUrl
 
 from models.user_info import UserSearchRequest, UserCreate, UserUpdate
+from profiling import Profiler
+from request_scheduler import RequestScheduler
+from resource_subscriptions import SubscriptionManager, parse_search_query
+from user_analytics import FIELDS, UserAnalytics
+from user_bulk import UserExporter, UserImporter
 from user_client import UserClient
+from user_format import USER_FORMAT_LEGEND
+from user_snapshot import UserSnapshot
 
 # 1. Create instance of FastMCP
 mcp = FastMCP(
@@ -15,42 +25,142 @@ mcp = FastMCP(
 # 2. Create UserClient
 user_client = UserClient()
 
+# 3. Create Profiler (opt-in with PROFILING_ENABLED, `kill -USR1 <pid>` toggles it at runtime)
+profiler = Profiler.from_env("mcp-server")
+profiler.install()
+
+# 4. Create RequestScheduler that guards all calls to the user service
+scheduler = RequestScheduler(profiler=profiler)
+
+# 5. Create UserSnapshot shared by the analytics and the export, loaded through the scheduler and reset by the write tools
+user_snapshot = UserSnapshot(
+    load_users=lambda: scheduler.read("user-snapshot", ("get_all_users",), user_client.get_all_users)
+)
+analytics = UserAnalytics(user_snapshot)
+
+
+# 6. Create SubscriptionManager, the write tools notify sessions subscribed to the user resources they change
+subscriptions = SubscriptionManager()
+
+# 7. Create UserExporter and UserImporter for bulk export resources and the import tool
+exporter = UserExporter(user_snapshot)
+importer = UserImporter(scheduler=scheduler, add_user=user_client.add_user)
+
+
+def _session_key(ctx: Context) -> str:
+    """Identify the MCP session the request belongs to, used for per-session rate limits"""
+    request = ctx.request_context.request
+    session_id = request.headers.get("mcp-session-id") if request is not None else None
+    return session_id or str(id(ctx.session))
+
 
 # ==================== TOOLS ====================
 
-@mcp.tool()
-async def get_user_by_id(user_id: int) -> str:
-    """Get a user by their ID from the user management system"""
-    return await user_client.get_user(user_id)
+@mcp.tool(description=f"Get a user by their ID from the user management system. {USER_FORMAT_LEGEND}")
+@profiler.profiled()
+async def get_user_by_id(user_id: int, ctx: Context) -> str:
+    return await scheduler.read(
+        _session_key(ctx),
+        ("get_user", user_id),
+        lambda: user_client.get_user(user_id)
+    )
 
 
 @mcp.tool()
-async def delete_user(user_id: int) -> str:
+@profiler.profiled()
+async def delete_user(user_id: int, ctx: Context) -> str:
     """Delete a user by their ID from the user management system"""
-    return await user_client.delete_user(user_id)
+    result = await scheduler.write(_session_key(ctx), lambda: user_client.delete_user(user_id))
+    user_snapshot.invalidate()
+    await subscriptions.notify_user_changed(user_id=user_id)
+    return result
 
 
-@mcp.tool()
+@mcp.tool(
+    description="Search for users in the user management system by name, surname, email, or gender. "
+                f"All parameters are optional and support partial matching. {USER_FORMAT_LEGEND}"
+)
+@profiler.profiled()
 async def search_user(
     name: str | None = None,
     surname: str | None = None,
     email: str | None = None,
-    gender: str | None = None
+    gender: str | None = None,
+    ctx: Context = None
 ) -> str:
-    """Search for users in the user management system by name, surname, email, or gender. All parameters are optional and support partial matching."""
-    return await user_client.search_users(name=name, surname=surname, email=email, gender=gender)
+    return await scheduler.read(
+        _session_key(ctx),
+        ("search_users", name, surname, email, gender),
+        lambda: user_client.search_users(name=name, surname=surname, email=email, gender=gender)
+    )
 
 
 @mcp.tool()
-async def add_user(user_data: UserCreate) -> str:
+@profiler.profiled()
+async def add_user(user_data: UserCreate, ctx: Context) -> str:
     """Add a new user to the user management system with the provided user data"""
-    return await user_client.add_user(user_data)
+    result = await scheduler.write(_session_key(ctx), lambda: user_client.add_user(user_data))
+    user_snapshot.invalidate()
+    await subscriptions.notify_user_changed(user=user_data.model_dump())
+    return result
 
 
 @mcp.tool()
-async def update_user(user_id: int, user_data: UserUpdate) -> str:
+@profiler.profiled()
+async def update_user(user_id: int, user_data: UserUpdate, ctx: Context) -> str:
     """Update an existing user in the user management system with the provided user data"""
-    return await user_client.update_user(user_id, user_data)
+    result = await scheduler.write(_session_key(ctx), lambda: user_client.update_user(user_id, user_data))
+    user_snapshot.invalidate()
+    await subscriptions.notify_user_changed(user_id=user_id)
+    return result
+
+
+@mcp.tool(
+    description="Compute statistics over ALL users in the user management system without listing them: "
+                "count users or get min/max/avg/sum of a field, optionally grouped by a field and filtered by "
+                "gender, company or country (case-insensitive exact match). Use it instead of search_user for "
+                "questions like 'how many users per gender' or 'average salary at company X'. "
+                f"Fields: {', '.join(FIELDS)}."
+)
+@profiler.profiled()
+async def aggregate_users(
+    operation: Literal["count", "min", "max", "avg", "sum"] = "count",
+    field: str | None = None,
+    group_by: str | None = None,
+    gender: str | None = None,
+    company: str | None = None,
+    country: str | None = None,
+    ctx: Context = None
+) -> str:
+    await scheduler.admit(_session_key(ctx))
+    return await analytics.aggregate(
+        operation=operation,
+        field=field,
+        group_by=group_by,
+        filters={"gender": gender, "company": company, "address.country": country}
+    )
+
+
+@mcp.tool()
+@profiler.profiled()
+async def import_users(
+    payload: str,
+    format: Literal["jsonl", "csv"] = "jsonl",
+    dry_run: bool = False,
+    ctx: Context = None
+) -> str:
+    """
+    Bulk import users into the user management system from a JSONL payload (one user object per line) or a CSV payload
+    (header row, nested fields as dotted columns like `address.city`), e.g. an export of this server.
+    Rows are validated against the add_user schema, invalid or failed rows are reported with their line number.
+    Set dry_run to only validate the payload.
+    """
+    report = await importer.run(_session_key(ctx), payload, format, dry_run=dry_run)
+    if report.imported:
+        user_snapshot.invalidate()
+        # Search results may change in any way, one notification per subscribed search instead of one per user
+        await subscriptions.notify(subscriptions.subscribed_search_uris())
+    return report.summary()
 
 
 # ==================== MCP RESOURCES ====================
@@ -63,6 +173,82 @@ async def get_flow_diagram() -> bytes:
         return f.read()
 
 
+@mcp.resource("users-management://users/{user_id}", mime_type="text/plain")
+@profiler.profiled()
+async def get_user_resource(user_id: str) -> str:
+    """A single user, subscribe to it to be notified when the user is updated or deleted"""
+    return await scheduler.read(
+        _session_key(mcp.get_context()),
+        ("get_user", int(user_id)),
+        lambda: user_client.get_user(int(user_id))
+    )
+
+
+@mcp.resource("users-management://users/search/{query}", mime_type="text/plain")
+@profiler.profiled()
+async def search_users_resource(query: str) -> str:
+    """Users matching a search query (e.g. `name=john&gender=male`), subscribe to it to be notified when the result may change"""
+    params = parse_search_query(query)
+    return await scheduler.read(
+        _session_key(mcp.get_context()),
+        ("search_users", *(params.get(field) for field in ("name", "surname", "email", "gender"))),
+        lambda: user_client.search_users(**params)
+    )
+
+
+@mcp.resource("users-management://export", mime_type="application/json")
+async def get_export_summary() -> str:
+    """Describes the bulk export: number of users and pages, formats and how to page through them"""
+    return json.dumps(await exporter.summary())
+
+
+@mcp.resource("users-management://export/{fmt}/{after_id}", mime_type="text/plain")
+@profiler.profiled()
+async def export_users_page(fmt: str, after_id: str) -> str:
+    """
+    A page of users ordered by id in `jsonl` or `csv` format, starting after the user with id `after_id` (0 for the
+    first page). Read the next page with the id of the last exported user, an empty page ends the export.
+    """
+    await scheduler.admit(_session_key(mcp.get_context()))
+    return await exporter.page(fmt, int(after_id))
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    subscriptions.subscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    subscriptions.unsubscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+def _get_capabilities_with_subscribe(get_capabilities):
+    # The SDK always advertises `subscribe=False`, even when subscribe handlers are registered
+    def wrapper(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+    return wrapper
+
+
+mcp._mcp_server.get_capabilities = _get_capabilities_with_subscribe(mcp._mcp_server.get_capabilities)
+
+
+@mcp.resource("users-management://scheduler/metrics", mime_type="application/json")
+async def get_scheduler_metrics() -> str:
+    """Provides request scheduler metrics: queue depth, running and coalesced requests, rate-limit rejections"""
+    return json.dumps(scheduler.metrics())
+
+
+@mcp.resource("users-management://profiling/stats", mime_type="application/json")
+async def get_profiling_stats() -> str:
+    """Provides profiler state: whether sampling runs, slow calls captured, event loop lag, the last dump written"""
+    return json.dumps(profiler.stats())
+
+
 # ==================== MCP PROMPTS ====================
 
 @mcp.prompt()
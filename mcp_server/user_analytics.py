@@ -0,0 +1,127 @@
+import os
+from collections import Counter
+from itertools import compress
+from typing import Any
+
+from user_format import FIELD_PATHS, SENSITIVE_FIELDS
+from user_snapshot import UserSnapshot
+
+OPERATIONS = ("count", "min", "max", "avg", "sum")
+
+# Fields that can be aggregated or grouped by (dotted paths for nested fields), sensitive fields excluded
+FIELDS = [".".join(path) for path in FIELD_PATHS if path[0] not in SENSITIVE_FIELDS]
+
+MAX_GROUPS = int(os.getenv("ANALYTICS_MAX_GROUPS", "30"))
+
+
+class UserColumns:
+    """Column-oriented snapshot of the user dataset: one list of values per field"""
+
+    def __init__(self, users: list[dict[str, Any]]) -> None:
+        self.size = len(users)
+        self.columns: dict[str, list[Any]] = {}
+        for field in FIELDS:
+            path = field.split(".")
+            if len(path) == 1:
+                self.columns[field] = [user.get(field) for user in users]
+            else:
+                parent, child = path
+                self.columns[field] = [(user.get(parent) or {}).get(child) for user in users]
+
+    def mask(self, filters: dict[str, str]) -> list[bool]:
+        """Rows matching every filter (case-insensitive exact match)"""
+        mask = [True] * self.size
+        for field, expected in filters.items():
+            expected = expected.lower()
+            mask = [
+                selected and value is not None and str(value).lower() == expected
+                for selected, value in zip(mask, self.columns[field])
+            ]
+        return mask
+
+
+class UserAnalytics:
+    """
+    Aggregations over the whole user dataset computed in the server, so only a compact summary reaches the model.
+    The columns are a view of the shared user snapshot, results are cached for as long as the snapshot lives.
+    """
+
+    def __init__(self, snapshot: UserSnapshot) -> None:
+        self.snapshot = snapshot
+        self._columns: UserColumns | None = None
+        self._results: dict[tuple, str] = {}
+
+    async def aggregate(
+            self,
+            operation: str,
+            field: str | None = None,
+            group_by: str | None = None,
+            filters: dict[str, str | None] | None = None,
+    ) -> str:
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}', expected one of: {', '.join(OPERATIONS)}")
+        if operation != "count" and not field:
+            raise ValueError(f"Operation '{operation}' requires a field")
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        for name in (field, group_by, *filters):
+            if name and name not in FIELDS:
+                raise ValueError(f"Unknown field '{name}', expected one of: {', '.join(FIELDS)}")
+
+        key = (operation, field, group_by, tuple(sorted(filters.items())))
+        columns = await self.snapshot.view("analytics_columns", UserColumns)
+        # New columns mean a new snapshot, results of the previous one are dropped
+        if columns is not self._columns:
+            self._columns, self._results = columns, {}
+        if key not in self._results:
+            self._results[key] = self._compute(columns, operation, field, group_by, filters)
+        return self._results[key]
+
+    def _compute(self, snapshot: UserColumns, operation: str, field: str | None, group_by: str | None, filters: dict[str, str]) -> str:
+        mask = snapshot.mask(filters)
+        values = list(compress(snapshot.columns[field], mask)) if field else None
+        title = f"{operation}({field})" if field else "count"
+        if filters:
+            title += " where " + ", ".join(f"{name}={value}" for name, value in sorted(filters.items()))
+
+        if not group_by:
+            return f"{title}: {self._reduce(operation, values, sum(mask))}"
+
+        keys = list(compress(snapshot.columns[group_by], mask))
+        if operation == "count":
+            groups = Counter(keys)
+            rows = [(key, count) for key, count in groups.most_common()]
+        else:
+            grouped: dict[Any, list[Any]] = {}
+            for key, value in zip(keys, values):
+                grouped.setdefault(key, []).append(value)
+            rows = [(key, self._reduce(operation, group_values, len(group_values))) for key, group_values in grouped.items()]
+            # Largest results first (smallest for min), groups without values last
+            rows = sorted(
+                (row for row in rows if row[1] is not None),
+                key=lambda row: row[1],
+                reverse=operation != "min"
+            ) + [row for row in rows if row[1] is None]
+
+        lines = [f"{title} by {group_by} ({len(rows)} groups, {sum(mask)} users):"]
+        lines += [f"{'(empty)' if key is None else key}={result}" for key, result in rows[:MAX_GROUPS]]
+        if len(rows) > MAX_GROUPS:
+            lines.append(f"... {len(rows) - MAX_GROUPS} more groups omitted")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _reduce(operation: str, values: list[Any] | None, count: int) -> Any:
+        if operation == "count":
+            return count
+
+        present = [value for value in values if value is not None and value != ""]
+        if not present:
+            return None
+        if operation in ("min", "max"):
+            # Dates are ISO strings and compare correctly as text
+            return min(present) if operation == "min" else max(present)
+
+        numbers = [value for value in present if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        if not numbers:
+            raise ValueError(f"Operation '{operation}' requires a numeric field")
+        total = sum(numbers)
+        return round(total if operation == "sum" else total / len(numbers), 2)
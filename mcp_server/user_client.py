@@ -1,38 +1,45 @@
-import os
-from typing import Any, Optional
+from __future__ import annotations
 
-import requests
+import asyncio
+import os
+from typing import TYPE_CHECKING, Any, Optional
 
 from models.user_info import UserUpdate, UserCreate
+from user_format import encode_user, encode_users
+
+if TYPE_CHECKING:
+    import requests
 
 USER_SERVICE_ENDPOINT = os.getenv("USERS_MANAGEMENT_SERVICE_URL", "http://localhost:8041")
 
 class UserClient:
 
-    def __user_to_string(self, user: dict[str, Any]):
-        user_str = "```\n"
-        for key, value in user.items():
-            user_str += f"  {key}: {value}\n"
-        user_str += "```\n"
+    def __init__(self) -> None:
+        self._session: requests.Session | None = None
 
-        return user_str
+    @property
+    def _http(self) -> requests.Session:
+        # requests is imported on first call to keep server cold start fast,
+        # the session reuses connections to the user service between calls.
+        # Calls run in worker threads (asyncio.to_thread) so they never block the event loop
+        if self._session is None:
+            import requests
 
-    def __users_to_string(self, users: list[dict[str, Any]]):
-        users_str = ""
-        for value in users:
-            users_str += self.__user_to_string(value)
-        users_str += "\n"
-
-        return users_str
+            self._session = requests.Session()
+        return self._session
 
     async def get_user(self, user_id: int) -> str:
         headers = {"Content-Type": "application/json"}
 
-        response = requests.get(url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}", headers=headers)
+        response = await asyncio.to_thread(
+            self._http.get,
+            url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}",
+            headers=headers
+        )
 
         if response.status_code == 200:
             data = response.json()
-            return self.__user_to_string(data)
+            return encode_user(data)
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
@@ -55,47 +62,73 @@ class UserClient:
         if gender:
             params["gender"] = gender
 
-        response = requests.get(url=USER_SERVICE_ENDPOINT + "/v1/users/search", headers=headers, params=params)
+        response = await asyncio.to_thread(
+            self._http.get,
+            url=USER_SERVICE_ENDPOINT + "/v1/users/search",
+            headers=headers,
+            params=params
+        )
 
         if response.status_code == 200:
             data = response.json()
             print(f"Get {len(data)} users successfully")
-            return self.__users_to_string(data)
+            return encode_users(data)
+
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    async def get_all_users(self) -> list[dict[str, Any]]:
+        """Raw records of all users, used for server-side aggregations"""
+        headers = {"Content-Type": "application/json"}
+
+        response = await asyncio.to_thread(
+            self._http.get,
+            url=USER_SERVICE_ENDPOINT + "/v1/users/search",
+            headers=headers
+        )
+
+        if response.status_code == 200:
+            return response.json()
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
     async def add_user(self, user_create_model: UserCreate) -> str:
         headers = {"Content-Type": "application/json"}
 
-        response = requests.post(
+        response = await asyncio.to_thread(
+            self._http.post,
             url=f"{USER_SERVICE_ENDPOINT}/v1/users",
             headers=headers,
             json=user_create_model.model_dump()
         )
 
         if response.status_code == 201:
-            return f"User successfully added: {response.text}"
+            return f"User successfully added: {encode_user(response.json())}"
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
     async def update_user(self, user_id: int, user_update_model: UserUpdate) -> str:
         headers = {"Content-Type": "application/json"}
 
-        response = requests.put(
+        response = await asyncio.to_thread(
+            self._http.put,
             url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}",
             headers=headers,
             json=user_update_model.model_dump()
         )
 
         if response.status_code == 201:
-            return f"User successfully updated: {response.text}"
+            return f"User successfully updated: {encode_user(response.json())}"
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
     async def delete_user(self, user_id: int) -> str:
         headers = {"Content-Type": "application/json"}
 
-        response = requests.delete(url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}", headers=headers)
+        response = await asyncio.to_thread(
+            self._http.delete,
+            url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}",
+            headers=headers
+        )
 
         if response.status_code == 204:
             return "User successfully deleted"
@@ -0,0 +1,114 @@
+import os
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from models.user_info import UserCreate
+
+# How sensitive fields (credit card) are rendered: `mask` (last 4 digits), `omit` or `show` (CVV is never shown)
+SENSITIVE_FIELDS_POLICY = os.getenv("USER_SENSITIVE_FIELDS_POLICY", "mask")
+
+SENSITIVE_FIELDS = {"credit_card"}
+
+# Short keys for every (flattened) field of UserCreate, plus fields added by the user service
+FIELD_ALIASES = {
+    "id": "id",
+    "name": "n",
+    "surname": "sn",
+    "email": "em",
+    "phone": "ph",
+    "date_of_birth": "dob",
+    "address.country": "ctry",
+    "address.city": "city",
+    "address.street": "st",
+    "address.flat_house": "apt",
+    "gender": "g",
+    "company": "co",
+    "salary": "sal",
+    "about_me": "bio",
+    "credit_card": "cc",
+}
+
+# Service bookkeeping fields that carry no value for the model
+DROPPED_FIELDS = {"created_at", "updated_at"}
+
+
+def _nested_model(annotation: Any) -> type[BaseModel] | None:
+    """Return the BaseModel class of a (possibly Optional) nested model field"""
+    if get_origin(annotation) is Union:
+        for arg in get_args(annotation):
+            if isinstance(arg, type) and issubclass(arg, BaseModel):
+                return arg
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _flatten_fields(model: type[BaseModel]) -> list[tuple[str, ...]]:
+    """Field paths of the model in declaration order, nested models are flattened (address -> address.city)"""
+    paths = []
+    for name, field in model.model_fields.items():
+        nested = _nested_model(field.annotation)
+        if nested is not None and name not in SENSITIVE_FIELDS:
+            paths.extend((name, *sub_path) for sub_path in _flatten_fields(nested))
+        else:
+            paths.append((name,))
+    return paths
+
+
+FIELD_PATHS: list[tuple[str, ...]] = [("id",), *_flatten_fields(UserCreate)]
+
+missing_aliases = {".".join(path) for path in FIELD_PATHS} - FIELD_ALIASES.keys()
+if missing_aliases:
+    raise RuntimeError(f"No short keys defined for user fields: {', '.join(sorted(missing_aliases))}")
+
+USER_FORMAT_LEGEND = (
+    "Users are returned one per line as `key=value` pairs separated by `|`, empty fields are omitted. "
+    "Keys: " + ", ".join(f"{alias}={path}" for path, alias in FIELD_ALIASES.items()) + "."
+)
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).replace("\\", "\\\\").replace("|", "\\|").replace("\n", "\\n")
+
+
+def _format_sensitive(name: str, value: Any) -> str | None:
+    if SENSITIVE_FIELDS_POLICY == "omit" or not isinstance(value, dict):
+        return None
+    if name == "credit_card":
+        num = str(value.get("num") or "")
+        if SENSITIVE_FIELDS_POLICY == "show":
+            return f"{num} exp {value.get('exp_date')}"
+        return f"****{num[-4:]}" if num else None
+    return None
+
+
+def encode_user(user: dict[str, Any]) -> str:
+    """Encode a user as a single compact line, see USER_FORMAT_LEGEND"""
+    parts = []
+    for path in FIELD_PATHS:
+        value = user
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if path[0] in SENSITIVE_FIELDS:
+            value = _format_sensitive(path[0], value)
+        if value is None or value == "":
+            continue
+        parts.append(f"{FIELD_ALIASES['.'.join(path)]}={_format_value(value)}")
+
+    # Fields unknown to the schema are kept under their original names
+    known = {path[0] for path in FIELD_PATHS} | DROPPED_FIELDS
+    for key, value in user.items():
+        if key not in known and value is not None and value != "":
+            parts.append(f"{key}={_format_value(value)}")
+
+    return "|".join(parts)
+
+
+def encode_users(users: list[dict[str, Any]]) -> str:
+    if not users:
+        return "No users found"
+    return "\n".join(encode_user(user) for user in users)
@@ -0,0 +1,58 @@
+import os
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class UserSnapshot:
+    """
+    The whole user dataset sorted by id, loaded once and shared by the analytics and the bulk export. Cached until a
+    write tool invalidates it or the TTL expires (the user service can also be changed by other clients).
+    Consumers keep what they derive from it (columns, id index) as views, built once per snapshot.
+    """
+
+    def __init__(
+            self,
+            load_users: Callable[[], Awaitable[list[dict[str, Any]]]],
+            ttl_seconds: float = float(os.getenv("USER_SNAPSHOT_TTL_SECONDS", "60")),
+    ) -> None:
+        self._load_users = load_users
+        self.ttl_seconds = ttl_seconds
+        self._users: list[dict[str, Any]] | None = None
+        self._views: dict[str, Any] = {}
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._users = None
+        self._views.clear()
+
+    async def users(self) -> list[dict[str, Any]]:
+        users, _ = await self._get()
+        return users
+
+    async def view(self, name: str, build: Callable[[list[dict[str, Any]]], T]) -> T:
+        """Data derived from the users, built on first use and dropped with the snapshot"""
+        users, current = await self._get()
+        if not current:
+            return build(users)
+        if name not in self._views:
+            self._views[name] = build(users)
+        return self._views[name]
+
+    async def _get(self) -> tuple[list[dict[str, Any]], bool]:
+        """The users and whether they are the cached snapshot"""
+        if self._users is not None and time.monotonic() - self._loaded_at <= self.ttl_seconds:
+            return self._users, True
+
+        generation = self._generation
+        users = sorted(await self._load_users(), key=lambda user: user["id"])
+        # A write during the load makes the data stale, use it for this call only
+        if generation != self._generation:
+            return users, False
+        self._users = users
+        self._views.clear()
+        self._loaded_at = time.monotonic()
+        return users, True
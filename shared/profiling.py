@@ -0,0 +1,284 @@
+import asyncio
+import contextvars
+import functools
+import itertools
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+# Leaf frames of threads that are parked and not doing any work (thread pool workers waiting for a job, etc.)
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+}
+
+
+@dataclass
+class Span:
+    """A traced call, nested spans form the call tree of a slow call"""
+    name: str
+    started_at: float
+    duration: float = 0.0
+    children: list["Span"] = field(default_factory=list)
+
+    def render(self, depth: int = 0) -> list[str]:
+        lines = [f"{'  ' * depth}{self.name} {self.duration * 1000:.1f} ms"]
+        for child in self.children:
+            lines += child.render(depth + 1)
+        return lines
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+class Profiler:
+    """
+    Opt-in, process-wide profiling:
+    - a sampling profiler thread that records the stacks of all threads via `sys._current_frames()`
+    - an event loop lag monitor that dumps what the loop thread was running while it was blocked
+    - slow-call capture: traced calls over the threshold dump their call tree and the stacks sampled meanwhile
+    Dumps use the folded stack format (`frame;frame;frame count`), ready for flamegraph.pl or speedscope.
+    While stopped, tracing costs a single attribute check.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            enabled: bool = False,
+            output_dir: str = ".profiles",
+            interval: float = 0.01,
+            slow_call_threshold: float = 2.0,
+            loop_lag_threshold: float = 0.1,
+            buffer_seconds: float = 120.0,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.interval = interval
+        self.slow_call_threshold = slow_call_threshold
+        self.loop_lag_threshold = loop_lag_threshold
+
+        self.running = False
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._toggle_lock = threading.Lock()
+        # (timestamp, [(folded stack, ...)]) per sampling tick, slow calls are cut out of it
+        self._samples: deque[tuple[float, list[str]]] = deque(maxlen=max(1, int(buffer_seconds / interval)))
+        self._totals: Counter[str] = Counter()
+        self._blocked: Counter[str] = Counter()
+        self._labels: dict[Any, str] = {}
+        self._thread_names: dict[int, str] = {}
+        self._dump_ids = itertools.count(1)
+
+        self._active_calls = 0
+        self._loop_thread_id: int | None = None
+        self._loop_heartbeat = 0.0
+        self._monitor_task: asyncio.Task | None = None
+
+        self._stats = {
+            "samples": 0,
+            "slow_calls": 0,
+            "loop_lag_events": 0,
+            "max_loop_lag_ms": 0.0,
+            "last_dump": None,
+        }
+
+    @classmethod
+    def from_env(cls, name: str) -> "Profiler":
+        return cls(
+            name=name,
+            enabled=os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes"),
+            output_dir=os.getenv("PROFILING_DIR", ".profiles"),
+            interval=float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "10")) / 1000,
+            slow_call_threshold=float(os.getenv("PROFILING_SLOW_CALL_MS", "2000")) / 1000,
+            loop_lag_threshold=float(os.getenv("PROFILING_LOOP_LAG_MS", "100")) / 1000,
+            buffer_seconds=float(os.getenv("PROFILING_BUFFER_SECONDS", "120")),
+        )
+
+    def install(self) -> None:
+        """Start profiling if enabled and let SIGUSR1 toggle it at runtime (`kill -USR1 <pid>`)"""
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._on_toggle_signal)
+        if self.enabled:
+            self.start()
+
+    def _on_toggle_signal(self, *_) -> None:
+        # The handler interrupts the main thread (the event loop thread) wherever it is, possibly holding `_lock`.
+        # Stopping joins the sampler thread, which may be waiting for that lock, so the toggle runs on its own thread
+        threading.Thread(target=self.toggle, name=f"{self.name}-profiler-toggle", daemon=True).start()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._totals.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name=f"{self.name}-profiler", daemon=True)
+        self._thread.start()
+        print(f"🔬 Profiling started (pid {os.getpid()}), dumps go to {os.path.abspath(self.output_dir)}")
+
+    def stop(self) -> None:
+        """Stop sampling and dump the profile of the whole profiling session"""
+        if not self.running:
+            return
+        self.running = False
+        self._thread.join()
+        with self._lock:
+            totals = dict(self._totals)
+        path = self._dump("session", totals)
+        print(f"🔬 Profiling stopped, session profile: {path}")
+
+    def toggle(self) -> None:
+        with self._toggle_lock:
+            self.stop() if self.running else self.start()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._stats,
+            "running": self.running,
+            "active_calls": self._active_calls,
+            "interval_ms": self.interval * 1000,
+            "slow_call_threshold_ms": self.slow_call_threshold * 1000,
+            "loop_lag_threshold_ms": self.loop_lag_threshold * 1000,
+        }
+
+    @asynccontextmanager
+    async def trace(self, name: str) -> AsyncIterator[None]:
+        """Time a call, calls over the slow call threshold dump their call tree and sampled stacks"""
+        if not self.running:
+            yield
+            return
+
+        self._ensure_loop_monitor()
+        parent = _current_span.get()
+        span = Span(name=name, started_at=time.monotonic())
+        if parent is not None:
+            parent.children.append(span)
+        token = _current_span.set(span)
+        self._active_calls += 1
+        try:
+            yield
+        finally:
+            self._active_calls -= 1
+            _current_span.reset(token)
+            span.duration = time.monotonic() - span.started_at
+            # Only the outermost slow call is dumped, its tree already contains the nested ones
+            if parent is None and span.duration >= self.slow_call_threshold and self.running:
+                self._dump_slow_call(span)
+
+    def profiled(self, name: str | None = None) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+        """Decorator tracing every call of an async function (keeps the signature, so it works under @mcp.tool)"""
+
+        def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs) -> T:
+                if not self.running:
+                    return await func(*args, **kwargs)
+                async with self.trace(name or func.__name__):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _dump_slow_call(self, span: Span) -> None:
+        end = span.started_at + span.duration
+        with self._lock:
+            stacks = Counter(stack for at, tick in self._samples if span.started_at <= at <= end for stack in tick)
+        path = self._dump(f"slow-{span.name}", stacks, call_tree=span.render())
+        self._stats["slow_calls"] += 1
+        print(f"🐢 Slow call {span.name} took {span.duration * 1000:.0f} ms, profile: {path}")
+
+    def _ensure_loop_monitor(self) -> None:
+        if self._monitor_task is None or self._monitor_task.done():
+            self._loop_thread_id = threading.get_ident()
+            self._loop_heartbeat = time.monotonic()
+            self._monitor_task = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+
+    async def _monitor_loop_lag(self) -> None:
+        interval = self.loop_lag_threshold / 2
+        while self.running:
+            # Lag only counts while traced calls are in flight, an interactive prompt blocking the loop is not a problem
+            active = self._active_calls > 0
+            started_at = time.monotonic()
+            await asyncio.sleep(interval)
+            self._loop_heartbeat = time.monotonic()
+            lag = self._loop_heartbeat - started_at - interval
+
+            if lag < self.loop_lag_threshold or not active or not self._active_calls:
+                continue
+            self._stats["loop_lag_events"] += 1
+            self._stats["max_loop_lag_ms"] = max(self._stats["max_loop_lag_ms"], round(lag * 1000, 1))
+            with self._lock:
+                blocked = dict(self._blocked)
+                self._blocked.clear()
+            path = self._dump("loop-blocked", blocked)
+            print(f"⏱️ Event loop was blocked for {lag * 1000:.0f} ms, profile: {path}")
+
+    def _sample_loop(self) -> None:
+        own_id = threading.get_ident()
+        while self.running:
+            now = time.monotonic()
+            loop_blocked = (
+                    self._active_calls > 0
+                    and self._loop_thread_id is not None
+                    and now - self._loop_heartbeat > self.loop_lag_threshold
+            )
+            tick = []
+            blocked_stack = None
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                is_loop_thread = thread_id == self._loop_thread_id
+                if not is_loop_thread and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_LEAVES:
+                    continue
+                stack = self._fold(thread_id, frame)
+                tick.append(stack)
+                if is_loop_thread and loop_blocked:
+                    blocked_stack = stack
+
+            with self._lock:
+                self._samples.append((now, tick))
+                self._totals.update(tick)
+                if blocked_stack is not None:
+                    self._blocked[blocked_stack] += 1
+            self._stats["samples"] += 1
+            time.sleep(self.interval)
+
+    def _fold(self, thread_id: int, frame) -> str:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                self._labels[code] = label
+            labels.append(label)
+            frame = frame.f_back
+        if thread_id not in self._thread_names:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        labels.append(self._thread_names.get(thread_id, str(thread_id)))
+        return ";".join(reversed(labels))
+
+    def _dump(self, kind: str, stacks: dict[str, int], call_tree: list[str] | None = None) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        file_name = f"{self.name}-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}-{next(self._dump_ids)}-{kind}"
+        base = os.path.join(self.output_dir, re.sub(r"[^\w.-]", "_", file_name))
+        with open(f"{base}.folded", "w", encoding="utf-8") as file:
+            for stack, count in sorted(stacks.items()):
+                file.write(f"{stack} {count}\n")
+        if call_tree is not None:
+            with open(f"{base}.tree.txt", "w", encoding="utf-8") as file:
+                file.write("\n".join(call_tree) + "\n")
+        self._stats["last_dump"] = f"{base}.folded"
+        return f"{base}.folded"
@@ -3,6 +3,8 @@
 
 cd "$(dirname "$0")"
 source .venv/bin/activate
+# Modules shared by the agent and the MCP server (profiling.py) live in shared/
+export PYTHONPATH="$PWD/shared${PYTHONPATH:+:$PYTHONPATH}"
 
 # Check for required environment variables
 if [ -z "$DIAL_API_KEY" ] || [ -z "$DIAL_ENDPOINT" ]; then
@@ -3,4 +3,6 @@
 
 cd "$(dirname "$0")"
 source .venv/bin/activate
+# Modules shared by the agent and the MCP server (profiling.py) live in shared/
+export PYTHONPATH="$PWD/shared${PYTHONPATH:+:$PYTHONPATH}"
 python mcp_server/server.py